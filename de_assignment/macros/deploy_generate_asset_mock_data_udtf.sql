@@ -24,7 +24,15 @@ CREATE OR REPLACE FUNCTION {{ target.schema }}.generate_asset_mock_data_udtf(
     sensor_failures NUMBER(38,0),
     sensor_failure_duration_hours NUMBER(38,10),
     sensor_failure_type VARCHAR,
-    seed_value NUMBER(38,0)
+    seed_value NUMBER(38,0),
+    shard_start_date VARCHAR DEFAULT NULL,
+    shard_end_date VARCHAR DEFAULT NULL,
+    burn_in_hours NUMBER(38,10) DEFAULT 48,
+    engine VARCHAR DEFAULT NULL,
+    max_rows NUMBER(38,0) DEFAULT NULL,
+    max_memory_mb NUMBER(38,10) DEFAULT NULL,
+    dry_run BOOLEAN DEFAULT FALSE,
+    fleet_json VARCHAR DEFAULT NULL
 )
 RETURNS TABLE (
     customer_short_code VARCHAR,
@@ -40,12 +48,15 @@ RUNTIME_VERSION = 3.11
 PACKAGES = ('numpy')
 HANDLER = 'SyntheticDataGenerator'
 AS $$
+import bisect
 import math
 import random
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
+
 class SyntheticDataGenerator:
     def __init__(self):
         self.rows = []
@@ -70,6 +81,14 @@ class SyntheticDataGenerator:
         self.sensor_failure_duration_hours = None
         self.sensor_failure_type = None
         self.seed_value = None
+        self.shard_start_date = None
+        self.shard_end_date = None
+        self.burn_in_hours = None
+        self.engine = None
+        self.max_rows = None
+        self.max_memory_mb = None
+        self.dry_run = False
+        self.fleet_json = None
         
     def _parse_iso_datetime(self, value: str) -> datetime:
         try:
@@ -97,7 +116,8 @@ class SyntheticDataGenerator:
                        trend_state: Dict, start_ts: datetime,
                        drift_enabled: bool, drift_magnitude: float, 
                        drift_period_hours: float, setpoint_offset: float, 
-                       setpoint_change_speed: float) -> float:
+                       setpoint_change_speed: float, drift_level: Optional[float] = None,
+                       trend_nudge: Optional[float] = None) -> float:
         mid = (min_value + max_value) / 2.0
         span = (max_value - min_value)
         if span <= 0:
@@ -118,7 +138,9 @@ class SyntheticDataGenerator:
         daily_pattern = span * 0.2 * math.sin(phase)
         
         long_term_component = 0.0
-        if drift_enabled:
+        if drift_level is not None:
+            long_term_component = span * drift_level
+        elif drift_enabled:
             if 'drift_period_timesteps' not in trend_state or trend_state['drift_period_timesteps'] == 0:
                 trend_state['drift_period_timesteps'] = int(drift_period_hours)
             
@@ -142,7 +164,9 @@ class SyntheticDataGenerator:
         
         setpoint_component = span * trend_state['current_setpoint_offset']
         
-        if rng.random() < 0.01:
+        if trend_nudge is not None:
+            trend_state['trend_velocity'] += span * 0.001 * trend_nudge
+        elif rng.random() < 0.01:
             trend_state['trend_velocity'] += rng.uniform(-span * 0.001, span * 0.001)
         
         trend_state['trend'] += trend_state['trend_velocity']
@@ -161,11 +185,461 @@ class SyntheticDataGenerator:
         
         return max(min_value, min(max_value, value))
     
+    def _plan_setpoints(self, rng, setpt_chg, total_timesteps, setpt_mag):
+        setpoint_schedule = {}
+        if setpt_chg > 0:
+            interval = total_timesteps // (setpt_chg + 1)
+            for i in range(setpt_chg):
+                change_timestep = (i + 1) * interval
+                offset = rng.uniform(-setpt_mag, setpt_mag)
+                setpoint_schedule[change_timestep] = offset
+        return setpoint_schedule
+    
+    def _plan_sensor_failures(self, rng, sens_fail, total_timesteps, duration_steps, sens_type):
+        sensor_failure_periods = []
+        if sens_fail > 0:
+            actual_failures = rng.randint(0, sens_fail)
+            if actual_failures > 0:
+                interval = total_timesteps // (actual_failures + 1)
+                for i in range(actual_failures):
+                    base_start = (i + 1) * interval
+                    random_offset = rng.randint(-interval // 4, interval // 4)
+                    start_idx = max(0, min(base_start + random_offset, total_timesteps - duration_steps - 1))
+                    actual_duration = rng.randint(duration_steps // 2, duration_steps)
+                    end_idx = min(start_idx + actual_duration, total_timesteps - 1)
+                    
+                    if sens_type == "mixed":
+                        failure_mode = rng.choice(["erratic", "zero", "frozen"])
+                    else:
+                        failure_mode = sens_type
+                    
+                    sensor_failure_periods.append((start_idx, end_idx, failure_mode))
+        return sensor_failure_periods
+    
+    def _apply_gaps(self, rows, gaps_pct, rng):
+        if gaps_pct > 0 and rows:
+            total = len(rows)
+            drop_count = min(int(total * gaps_pct), total - 1)
+            if drop_count > 0:
+                indices = list(range(total))
+                rng.shuffle(indices)
+                keep_mask = set(indices[drop_count:])
+                rows = [r for i, r in enumerate(rows) if i in keep_mask]
+        return rows
+    
+    def _apply_anomalies(self, rows, anomalies_pct, anomaly_sev, sens_fail, datapoints, rng):
+        failure_row_indices = set()
+        if sens_fail > 0:
+            for row_idx, row in enumerate(rows):
+                val = row["value"]
+                if val == 0.0 or abs(val) > 1000:
+                    failure_row_indices.add(row_idx)
+        
+        if anomalies_pct > 0 and rows:
+            valid_indices = [i for i in range(len(rows)) if i not in failure_row_indices]
+            if valid_indices:
+                anomaly_count = min(int(len(valid_indices) * anomalies_pct), len(valid_indices))
+                if anomaly_count > 0:
+                    rng.shuffle(valid_indices)
+                    anomaly_indices = set(valid_indices[:anomaly_count])
+                    
+                    for i in anomaly_indices:
+                        row = rows[i]
+                        datapoint_name = row["datapoint"]
+                        if datapoint_name in datapoints:
+                            mn, mx = datapoints[datapoint_name]
+                            span = mx - mn
+                            current_val = row["value"]
+                            deviation = span * anomaly_sev * rng.uniform(0.5, 1.5)
+                            if rng.random() < 0.5:
+                                row["value"] = current_val + deviation
+                            else:
+                                row["value"] = current_val - deviation
+    
+    # Sharded backfill: same engine as the `backfill` mode of build_dataframe in the 0_lnd
+    # generators. Setpoints, failures, drift and trend nudges are planned over the full
+    # timeline from seed-derived RNGs, noise is keyed by absolute timestep, and the
+    # remaining state is warmed up over the burn-in window before the shard start.
+    NOISE_BLOCK_STEPS = 4096
+    BURN_IN_MIN_STEPS = 200
+    # Runtime and peak heap per generated row, calibrated with tools/lnd_cost.py calibrate
+    COST_PER_ROW = {
+        "legacy": {"seconds": 14.0e-6, "peak_bytes": 500},
+        "sharded": {"seconds": 17.5e-6, "peak_bytes": 520},
+        "fleet": {"seconds": 10.9e-6, "peak_bytes": 450},
+    }
+    
+    def _burn_in_settle_steps(self, lag_steps):
+        # Steps until a start-up error (up to half the span) in a leader's smoothed value, decaying as
+        # e[t] = 0.7 * 0.85 * e[t-1] + 0.3 * e[t-lag], is below the noise SD (0.8% of the span)
+        threshold = 0.008 / 0.5
+        history = [1.0] * lag_steps
+        steps = 0
+        while max(abs(e) for e in history[-lag_steps:]) >= threshold:
+            history.append(0.7 * 0.85 * history[-1] + 0.3 * history[-lag_steps])
+            steps += 1
+        return steps
+    
+    def _row_bytes(self, customer, site, asset_pairs, datapoints):
+        # Average output row as delimited text: keys, a 3-decimal value, 19 chars of timestamp, 7 delimiters
+        asset_chars = sum(len(t) + len(a) for t, a in asset_pairs) / max(1, len(asset_pairs))
+        datapoint_chars = sum(len(name) + len(f"{max(abs(mn), abs(mx)):.3f}")
+                              for name, (mn, mx) in datapoints.items()) / max(1, len(datapoints))
+        return len(customer) + len(site) + asset_chars + datapoint_chars + 19 + 7
+    
+    def _split_for_memory(self, budget_rows, asset_pairs, datapoint_count, window_steps, warm_steps):
+        # (sub_steps, asset groups) so one sub-shard, burn-in included, fits budget_rows: asset groups
+        # over the whole window first, time splits only when a single asset does not fit
+        type_count = len({asset_type for asset_type, _ in asset_pairs})
+        group_size = int(budget_rows / (datapoint_count * (window_steps + warm_steps))) - type_count
+        if group_size >= 1:
+            return max(1, window_steps), [asset_pairs[lo:lo + group_size] for lo in range(0, len(asset_pairs), group_size)]
+        # One asset plus its type's first asset per group, in time shards at least as long as the burn-in
+        sub_steps = int(budget_rows / (2 * datapoint_count)) - warm_steps
+        if sub_steps < max(1, warm_steps):
+            needed_mb = 2 * datapoint_count * 2 * max(1, warm_steps) * self.COST_PER_ROW["sharded"]["peak_bytes"] / 1e6
+            raise ValueError(f"max_memory_mb is too small: a sub-shard of one asset as long as its "
+                             f"{warm_steps}-step burn-in/lag window already needs {needed_mb:.2f} MB")
+        return sub_steps, [[pair] for pair in asset_pairs]
+    
+    def _plan_drift(self, rng, total_timesteps, drift_mag, drift_per):
+        period = max(1, int(drift_per))
+        period_variance = int(period * 0.2)
+        drift_speed = drift_mag / (period * 2)
+        starts, levels, directions = [], [], []
+        idx = 0
+        level = 0.0
+        direction = rng.choice([-1, 1])
+        while idx < total_timesteps:
+            starts.append(idx)
+            levels.append(level)
+            directions.append(direction)
+            length = period + 1 + rng.randint(-period_variance, period_variance)
+            level = max(-drift_mag, min(drift_mag, level + direction * drift_speed * length))
+            idx += length
+            direction *= -1
+        return {"starts": starts, "levels": levels, "directions": directions, "speed": drift_speed}
+    
+    def _drift_level_at(self, drift_plan, ts_idx, drift_mag):
+        seg = bisect.bisect_right(drift_plan["starts"], ts_idx) - 1
+        level = (drift_plan["levels"][seg]
+                 + drift_plan["directions"][seg] * drift_plan["speed"] * (ts_idx - drift_plan["starts"][seg] + 1))
+        return max(-drift_mag, min(drift_mag, level))
+    
+    def _plan_trend_nudges(self, rng, total_timesteps):
+        steps, nudges = [], []
+        idx = -1
+        while True:
+            idx += 1 + int(math.log(1.0 - rng.random()) / math.log(0.99))
+            if idx >= total_timesteps:
+                break
+            steps.append(idx)
+            nudges.append(rng.uniform(-1.0, 1.0))
+        return {"steps": steps, "nudges": nudges}
+    
+    def _trend_state_before(self, trend_plan, ts_idx, span):
+        ratio = 0.98 / 0.999
+        trend = 0.0
+        velocity = 0.0
+        lo = bisect.bisect_left(trend_plan["steps"], ts_idx - 20000)
+        hi = bisect.bisect_left(trend_plan["steps"], ts_idx)
+        for k in range(lo, hi):
+            n = ts_idx - 1 - trend_plan["steps"][k]
+            nudge = span * 0.001 * trend_plan["nudges"][k]
+            trend += nudge * 0.999 ** (n + 1) * (1.0 - ratio ** (n + 1)) / (1.0 - ratio)
+            velocity += nudge * 0.98 ** (n + 1)
+        return max(-span * 0.25, min(span * 0.25, trend)), velocity
+    
+    def _noise_rng(self, seed, asset_id, datapoint_name, ts_idx):
+        block = ts_idx // self.NOISE_BLOCK_STEPS
+        rng = random.Random(f"{seed}:{asset_id}:{datapoint_name}:noise{block}")
+        for _ in range(ts_idx - block * self.NOISE_BLOCK_STEPS):
+            rng.gauss(0.0, 1.0)
+        return rng
+    
+    def _generate_shard(self, timestamps, first_idx, last_idx, burn_in_steps, seed, customer, site,
+                        asset_pairs, datapoints, gaps_pct, anomalies_pct, anomaly_sev, lag_steps,
+                        drift_en, drift_mag, drift_per, setpt_chg, setpt_spd, setpt_mag,
+                        sens_fail, duration_steps, sens_type, output_ids=None, group_index=0):
+        # Only output_ids' rows are returned (the others are correlation sources); gaps and
+        # anomalies are drawn per asset group
+        total_timesteps = len(timestamps)
+        start = timestamps[0]
+        burn_in_steps = max(lag_steps, burn_in_steps)
+        warm_idx = max(0, first_idx - burn_in_steps)
+        setpoint_schedule = self._plan_setpoints(random.Random(f"{seed}:setpoints"), setpt_chg,
+                                                 total_timesteps, setpt_mag)
+        total_rows = total_timesteps * len(asset_pairs) * len(datapoints)
+        if gaps_pct >= 1:
+            gaps_pct = min(gaps_pct / total_rows, 0.99)
+        if anomalies_pct >= 1:
+            anomalies_pct = min(anomalies_pct / total_rows, 0.99)
+        
+        rows = []
+        asset_type_correlation = {}
+        for asset_type, asset_id in asset_pairs:
+            for datapoint_name, (mn, mx) in datapoints.items():
+                sensor_failure_periods = self._plan_sensor_failures(
+                    random.Random(f"{seed}:{asset_id}:{datapoint_name}:failures"),
+                    sens_fail, total_timesteps, duration_steps, sens_type)
+                drift_plan = self._plan_drift(random.Random(f"{seed}:{asset_id}:{datapoint_name}:drift"),
+                                              total_timesteps, drift_mag, drift_per) if drift_en else None
+                trend_plan = self._plan_trend_nudges(random.Random(f"{seed}:{asset_id}:{datapoint_name}:trend"),
+                                                     total_timesteps)
+                rng = random.Random(f"{seed}:{asset_id}:{datapoint_name}:shard{first_idx}")
+                
+                series_warm_idx = warm_idx
+                moved = True
+                while moved:
+                    moved = False
+                    for start_fail, end_fail, _ in sensor_failure_periods:
+                        if 0 < start_fail <= series_warm_idx <= end_fail:
+                            series_warm_idx = max(0, start_fail - burn_in_steps)
+                            moved = True
+                
+                active = [idx for idx in setpoint_schedule if idx < series_warm_idx]
+                current_setpoint_offset = setpoint_schedule[max(active)] if active else 0.0
+                trend, trend_velocity = self._trend_state_before(trend_plan, series_warm_idx, mx - mn)
+                trend_nudges = dict(zip(trend_plan["steps"], trend_plan["nudges"]))
+                trend_state = {
+                    'trend': trend,
+                    'trend_velocity': trend_velocity,
+                    'base_value': (mn + mx) / 2.0,
+                    'current_setpoint_offset': current_setpoint_offset,
+                }
+                prev_value = None
+                frozen_value = None
+                correlation_key = (asset_type, datapoint_name)
+                leader = correlation_key not in asset_type_correlation
+                series_values = []
+                # As in legacy, the first asset of a type correlates with its own lagged values
+                source = (series_warm_idx, series_values) if leader else asset_type_correlation[correlation_key]
+                noise_rng = self._noise_rng(seed, asset_id, datapoint_name, series_warm_idx)
+                
+                for ts_idx in range(series_warm_idx, last_idx + 1):
+                    ts = timestamps[ts_idx]
+                    if ts_idx % self.NOISE_BLOCK_STEPS == 0:
+                        noise_rng = self._noise_rng(seed, asset_id, datapoint_name, ts_idx)
+                    if ts_idx in setpoint_schedule:
+                        current_setpoint_offset = setpoint_schedule[ts_idx]
+                    
+                    failure_mode = None
+                    for start_fail, end_fail, mode in sensor_failure_periods:
+                        if start_fail <= ts_idx <= end_fail:
+                            failure_mode = mode
+                            break
+                    
+                    drift_level = self._drift_level_at(drift_plan, ts_idx, drift_mag) if drift_plan is not None else None
+                    if failure_mode in ("zero", "frozen", "erratic"):
+                        noise_rng.gauss(0.0, 1.0)
+                    if failure_mode == "zero":
+                        value = 0.0
+                    elif failure_mode == "frozen":
+                        if frozen_value is None:
+                            frozen_value = prev_value if prev_value is not None else (mn + mx) / 2
+                        value = frozen_value
+                    elif failure_mode == "erratic":
+                        span = mx - mn
+                        value = rng.uniform(mn - span * 0.5, mx + span * 0.5)
+                    else:
+                        value = self._generate_value(ts, mn, mx, noise_rng, prev_value, trend_state, start,
+                                                     False, drift_mag, drift_per,
+                                                     current_setpoint_offset, setpt_spd,
+                                                     drift_level=drift_level,
+                                                     trend_nudge=trend_nudges.get(ts_idx, 0.0))
+                    if failure_mode is None:
+                        frozen_value = None
+                        if source is not None:
+                            source_idx = ts_idx - lag_steps - source[0]
+                            if 0 <= source_idx < len(source[1]):
+                                source_normalized = (source[1][source_idx] - mn) / (mx - mn) if mx > mn else 0.5
+                                target_val = mn + (mx - mn) * source_normalized
+                                value = value * 0.7 + target_val * 0.3
+                    
+                    if leader:
+                        series_values.append(value)
+                    prev_value = value
+                    if ts_idx >= first_idx and (output_ids is None or asset_id in output_ids):
+                        rows.append({
+                            "customer": customer,
+                            "site": site,
+                            "asset_type": asset_type,
+                            "asset_id": asset_id,
+                            "ts": ts,
+                            "datapoint": datapoint_name,
+                            "value": value,
+                        })
+                
+                if leader:
+                    asset_type_correlation[correlation_key] = source
+        
+        post_rng = random.Random(f"{seed}:shard{first_idx}:group{group_index}:post")
+        rows = self._apply_gaps(rows, gaps_pct, post_rng)
+        self._apply_anomalies(rows, anomalies_pct, anomaly_sev, sens_fail, datapoints, post_rng)
+        return rows
+    
+    # Fleet engine: same engine as `engine: fleet` of the 0_lnd generators. Instead of pulling
+    # followers towards the first asset of their type, every series gets an AR(1) disturbance
+    # driven by innovations correlated across the assets and datapoints of a type (Cholesky
+    # factors of two equicorrelation matrices, factorized once), lagged per asset, and all
+    # series are advanced together one timestep at a time.
+    FLEET_BLOCK_STEPS = 4096
+    FAILURE_CODES = {"zero": 1, "frozen": 2, "erratic": 3}
+    
+    def _equicorrelation_factor(self, size, rho):
+        return np.linalg.cholesky(np.full((size, size), rho) + (1.0 - rho) * np.eye(size))
+    
+    def _fleet_blocks(self, timestamps, minutes_per_step, seed, customer, site, asset_pairs, datapoints,
+                      gaps_pct, anomalies_pct, anomaly_sev, lag_steps, drift_en, drift_mag, drift_per,
+                      setpt_chg, setpt_spd, setpt_mag, sens_fail, duration_steps, sens_type, fleet):
+        total_timesteps = len(timestamps)
+        setpoint_schedule = self._plan_setpoints(random.Random(f"{seed}:setpoints"), setpt_chg,
+                                                 total_timesteps, setpt_mag)
+        total_rows = total_timesteps * len(asset_pairs) * len(datapoints)
+        if gaps_pct >= 1:
+            gaps_pct = min(gaps_pct / total_rows, 0.99)
+        if anomalies_pct >= 1:
+            anomalies_pct = min(anomalies_pct / total_rows, 0.99)
+        
+        datapoint_names = list(datapoints)
+        datapoint_count = len(datapoint_names)
+        series = [(asset_type, asset_id, name) for asset_type, asset_id in asset_pairs for name in datapoint_names]
+        plans = []
+        for _, asset_id, name in series:
+            plans.append({
+                "failures": self._plan_sensor_failures(random.Random(f"{seed}:{asset_id}:{name}:failures"),
+                                                       sens_fail, total_timesteps, duration_steps, sens_type),
+                "drift": self._plan_drift(random.Random(f"{seed}:{asset_id}:{name}:drift"),
+                                          total_timesteps, drift_mag, drift_per) if drift_en else None,
+                "trend": self._plan_trend_nudges(random.Random(f"{seed}:{asset_id}:{name}:trend"), total_timesteps),
+            })
+        mn = np.array([datapoints[name][0] for _, _, name in series])
+        mx = np.array([datapoints[name][1] for _, _, name in series])
+        span = mx - mn
+        mid = (mn + mx) / 2.0
+        np_rng = np.random.default_rng(seed)
+        
+        datapoint_factor = self._equicorrelation_factor(datapoint_count, fleet["datapoint_correlation"])
+        positions = {}
+        for pos, (asset_type, _) in enumerate(asset_pairs):
+            positions.setdefault(asset_type, []).append(pos)
+        types = []
+        for pos in positions.values():
+            n = len(pos)
+            lags = np.rint(np.arange(n) / max(1, n - 1) * fleet["lag_spread"] * lag_steps).astype(int)
+            factor = self._equicorrelation_factor(n, fleet["asset_correlation"])
+            history = factor @ np_rng.standard_normal((int(lags.max()), n, datapoint_count)) @ datapoint_factor.T
+            columns = (np.array(pos)[:, None] * datapoint_count + np.arange(datapoint_count)[None, :]).ravel()
+            types.append({"columns": columns, "lags": lags, "factor": factor, "history": history})
+        
+        phi = math.exp(-minutes_per_step / (fleet["persistence_hours"] * 60.0))
+        innovation_scale = math.sqrt(1.0 - phi * phi)
+        amplitude = fleet["disturbance"] * span
+        noise_scale = span * 0.008
+        trend_limit = span * 0.25
+        
+        trend = np.zeros(len(series))
+        velocity = np.zeros(len(series))
+        disturbance = np.zeros(len(series))
+        frozen = np.full(len(series), np.nan)
+        prev = mid.copy()
+        setpoint_target = 0.0
+        setpoint_offset = 0.0
+        
+        for lo in range(0, total_timesteps, self.FLEET_BLOCK_STEPS):
+            hi = min(lo + self.FLEET_BLOCK_STEPS, total_timesteps)
+            steps = hi - lo
+            block_ts = timestamps[lo:hi]
+            daily = 0.2 * np.sin(2.0 * math.pi * np.array([(ts.hour * 60 + ts.minute) / 1440.0 for ts in block_ts]))
+            
+            innovations = np.empty((steps, len(series)))
+            for group in types:
+                fresh = group["factor"] @ np_rng.standard_normal((steps, len(group["lags"]), datapoint_count)) @ datapoint_factor.T
+                extended = np.concatenate([group["history"], fresh])
+                reach = len(group["history"])
+                rows_idx = reach - group["lags"][None, :] + np.arange(steps)[:, None]
+                lagged = extended[rows_idx, np.arange(len(group["lags"]))[None, :], :]
+                innovations[:, group["columns"]] = lagged.reshape(steps, -1)
+                group["history"] = extended[len(extended) - reach:]
+            
+            drift = np.zeros((steps, len(series)))
+            nudges = np.zeros((steps, len(series)))
+            modes = np.zeros((steps, len(series)), dtype=np.int8)
+            block_idx = np.arange(lo, hi)
+            for s, plan in enumerate(plans):
+                if plan["drift"] is not None:
+                    starts = np.array(plan["drift"]["starts"])
+                    seg = np.searchsorted(starts, block_idx, side="right") - 1
+                    level = (np.array(plan["drift"]["levels"])[seg] + np.array(plan["drift"]["directions"])[seg]
+                             * plan["drift"]["speed"] * (block_idx - starts[seg] + 1))
+                    drift[:, s] = np.clip(level, -drift_mag, drift_mag)
+                first = bisect.bisect_left(plan["trend"]["steps"], lo)
+                last = bisect.bisect_left(plan["trend"]["steps"], hi)
+                nudges[np.array(plan["trend"]["steps"][first:last], dtype=int) - lo, s] = plan["trend"]["nudges"][first:last]
+                for start_fail, end_fail, mode in plan["failures"]:
+                    if start_fail < hi and end_fail >= lo:
+                        modes[max(start_fail, lo) - lo:min(end_fail, hi - 1) - lo + 1, s] = self.FAILURE_CODES[mode]
+            failing = modes.any(axis=1)
+            noise = np_rng.standard_normal((steps, len(series))) * noise_scale
+            erratic = np_rng.uniform(mn - span * 0.5, mx + span * 0.5, size=(steps, len(series)))
+            
+            values = np.empty((steps, len(series)))
+            for t in range(steps):
+                ts_idx = lo + t
+                if ts_idx in setpoint_schedule:
+                    setpoint_target = setpoint_schedule[ts_idx]
+                offset_diff = setpoint_target - setpoint_offset
+                setpoint_offset = setpoint_offset + offset_diff * setpt_spd if abs(offset_diff) > 0.001 else setpoint_target
+                
+                velocity += span * 0.001 * nudges[t]
+                trend += velocity
+                velocity *= 0.98
+                trend *= 0.999
+                np.minimum(np.maximum(trend, -trend_limit, out=trend), trend_limit, out=trend)
+                disturbance = phi * disturbance + innovation_scale * innovations[t]
+                
+                if ts_idx == 0:
+                    base = mid
+                else:
+                    target = mid + span * (daily[t] + drift[t] + setpoint_offset) + trend + amplitude * disturbance
+                    base = prev * 0.85 + target * 0.15
+                value = np.minimum(np.maximum(base + noise[t], mn), mx)
+                if failing[t]:
+                    mode = modes[t]
+                    is_frozen = mode == self.FAILURE_CODES["frozen"]
+                    frozen = np.where(is_frozen, np.where(np.isnan(frozen), prev, frozen), np.nan)
+                    value = np.where(mode == self.FAILURE_CODES["zero"], 0.0,
+                                     np.where(is_frozen, frozen,
+                                              np.where(mode == self.FAILURE_CODES["erratic"], erratic[t], value)))
+                else:
+                    frozen.fill(np.nan)
+                values[t] = value
+                prev = value
+            
+            rows = []
+            for s, (asset_type, asset_id, datapoint_name) in enumerate(series):
+                for ts, value in zip(block_ts, values[:, s].tolist()):
+                    rows.append({
+                        "customer": customer,
+                        "site": site,
+                        "asset_type": asset_type,
+                        "asset_id": asset_id,
+                        "ts": ts,
+                        "datapoint": datapoint_name,
+                        "value": value,
+                    })
+            post_rng = random.Random(f"{seed}:fleet{lo}:post")
+            rows = self._apply_gaps(rows, gaps_pct, post_rng)
+            self._apply_anomalies(rows, anomalies_pct, anomaly_sev, sens_fail, datapoints, post_rng)
+            yield rows
+    
     def process(self, start_date, end_date, granularity, customer_code, site_code,
                 asset_types_json, datapoints_json, gaps, anomalies, anomaly_severity,
                 correlation_lag_minutes, drift_enabled, drift_magnitude, drift_period_hours,
                 setpoint_changes, setpoint_change_speed, setpoint_change_magnitude,
-                sensor_failures, sensor_failure_duration_hours, sensor_failure_type, seed_value):
+                sensor_failures, sensor_failure_duration_hours, sensor_failure_type, seed_value,
+                shard_start_date=None, shard_end_date=None, burn_in_hours=48, engine=None,
+                max_rows=None, max_memory_mb=None, dry_run=False, fleet_json=None):
         self.start_date = start_date
         self.end_date = end_date
         self.granularity = granularity
@@ -187,6 +661,14 @@ class SyntheticDataGenerator:
         self.sensor_failure_duration_hours = sensor_failure_duration_hours
         self.sensor_failure_type = sensor_failure_type
         self.seed_value = seed_value
+        self.shard_start_date = shard_start_date
+        self.shard_end_date = shard_end_date
+        self.burn_in_hours = burn_in_hours
+        self.engine = engine
+        self.max_rows = max_rows
+        self.max_memory_mb = max_memory_mb
+        self.dry_run = dry_run
+        self.fleet_json = fleet_json
     
     def end_partition(self):
         start = self._parse_iso_datetime(self.start_date)
@@ -231,16 +713,143 @@ class SyntheticDataGenerator:
             current = current + step
         
         total_timesteps = len(timestamps)
+        duration_steps = max(1, int((sens_dur * 60) / minutes_per_step))
         
-        setpoint_schedule = {}
-        if setpt_chg > 0:
-            interval = total_timesteps // (setpt_chg + 1)
-            for i in range(setpt_chg):
-                change_timestep = (i + 1) * interval
-                offset = rng.uniform(-setpt_mag, setpt_mag)
-                setpoint_schedule[change_timestep] = offset
+        # "legacy" keeps the original draw order from one shared random.Random(seed), so existing
+        # datasets reproduce exactly per seed; "sharded" is the parallel backfill engine and
+        # "fleet" the vectorized engine with fleet-wide correlation.
+        engine = str(self.engine or ("sharded" if self.shard_start_date is not None else "legacy")).lower()
+        if engine not in ("legacy", "sharded", "fleet"):
+            raise ValueError("engine must be one of: legacy, sharded, fleet")
+        if engine != "sharded" and self.shard_start_date is not None:
+            raise ValueError("shard_start_date requires engine 'sharded'")
+        fleet_raw = json.loads(self.fleet_json) if self.fleet_json else {}
+        if fleet_raw and engine != "fleet":
+            raise ValueError("fleet_json requires engine 'fleet'")
+        fleet = {
+            "asset_correlation": float(fleet_raw.get("asset_correlation", 0.6)),
+            "datapoint_correlation": float(fleet_raw.get("datapoint_correlation", 0.3)),
+            "lag_spread": float(fleet_raw.get("lag_spread", 1.0)),
+            "disturbance": float(fleet_raw.get("disturbance", 0.05)),
+            "persistence_hours": float(fleet_raw.get("persistence_hours", 6.0)),
+        }
+        for key in ("asset_correlation", "datapoint_correlation"):
+            if not 0.0 <= fleet[key] < 1.0:
+                raise ValueError(f"fleet_json {key} must be in [0, 1)")
+        if fleet["persistence_hours"] <= 0:
+            raise ValueError("fleet_json persistence_hours must be > 0")
         
-        duration_steps = max(1, int((sens_dur * 60) / minutes_per_step))
+        burn_in_steps = 0
+        if engine == "sharded":
+            # One shard of a parallel backfill: [shard_start_date, shard_end_date) within start..end
+            shard_start = self._parse_iso_datetime(self.shard_start_date) if self.shard_start_date is not None else start
+            shard_end = self._parse_iso_datetime(self.shard_end_date) if self.shard_end_date is not None else end + step
+            first_idx = bisect.bisect_left(timestamps, shard_start)
+            last_idx = bisect.bisect_left(timestamps, shard_end) - 1
+            burn_in_steps = int(float(self.burn_in_hours if self.burn_in_hours is not None else 48) * 60 / minutes_per_step)
+            # Let the smoothed state settle however few steps burn_in_hours is at this granularity
+            burn_in_steps = max(burn_in_steps, self._burn_in_settle_steps(lag_steps), self.BURN_IN_MIN_STEPS)
+        else:
+            first_idx, last_idx = 0, total_timesteps - 1
+        
+        # Cost plan for this partition from the arguments alone
+        series_count = len(asset_pairs) * len(datapoints)
+        window_steps = max(0, last_idx - first_idx + 1)
+        warm_steps = max(lag_steps, burn_in_steps) if engine == "sharded" and first_idx > 0 else 0
+        cost = self.COST_PER_ROW[engine]
+        gap_fraction = gaps_pct if gaps_pct < 1 else min(gaps_pct / max(1, series_count * total_timesteps), 1.0)
+        planned_rows = int(round(series_count * window_steps * (1.0 - gap_fraction)))
+        output_bytes = planned_rows * self._row_bytes(customer, site, asset_pairs, datapoints)
+        peak_memory_mb = series_count * (window_steps + warm_steps) * cost["peak_bytes"] / 1e6
+        sub_steps = max(1, window_steps)
+        groups = [asset_pairs]
+        if self.max_memory_mb is not None and peak_memory_mb > float(self.max_memory_mb) and engine == "sharded":
+            sub_steps, groups = self._split_for_memory(float(self.max_memory_mb) * 1e6 / cost["peak_bytes"],
+                                                       asset_pairs, len(datapoints), window_steps,
+                                                       max(lag_steps, burn_in_steps))
+        leaders = {}
+        for pair in asset_pairs:
+            leaders.setdefault(pair[0], pair)
+        # Followers need their type's first asset as correlation source, so it is generated alongside
+        chunks = []
+        for group in groups:
+            needed = set(group) | {leaders[asset_type] for asset_type, _ in group}
+            chunks.append((group, [pair for pair in asset_pairs if pair in needed]))
+        time_shards = (window_steps + sub_steps - 1) // sub_steps
+        sub_shards = time_shards * len(chunks)
+        
+        if self.dry_run:
+            plan_ts = timestamps[first_idx] if first_idx < total_timesteps else start
+            if sub_shards <= 1:
+                sub_peak_mb = peak_memory_mb
+            else:
+                sub_warm = max(lag_steps, burn_in_steps) if time_shards > 1 else warm_steps
+                sub_peak_mb = max(len(needed) for _, needed in chunks) * len(datapoints) * \
+                    (min(sub_steps, window_steps) + sub_warm) * cost["peak_bytes"] / 1e6
+            generated_steps = window_steps + (time_shards - 1) * max(lag_steps, burn_in_steps) + warm_steps
+            runtime_seconds = sum(len(needed) for _, needed in chunks) * len(datapoints) * generated_steps * cost["seconds"]
+            for metric, value in (("rows", planned_rows),
+                                  ("output_bytes", output_bytes),
+                                  ("peak_memory_mb", sub_peak_mb),
+                                  ("runtime_seconds", runtime_seconds),
+                                  ("sub_shards", sub_shards)):
+                yield (customer, site, "__dry_run__", engine, plan_ts, metric, float(value))
+            return
+        if self.max_rows is not None and planned_rows > int(self.max_rows):
+            raise ValueError(f"{planned_rows} rows exceed max_rows {int(self.max_rows)}; "
+                             "narrow the call or split it with shard_start_date/shard_end_date")
+        if self.max_memory_mb is not None and peak_memory_mb > float(self.max_memory_mb) and engine != "sharded":
+            raise ValueError(f"{peak_memory_mb:.0f} MB peak memory exceeds max_memory_mb {float(self.max_memory_mb):g}; "
+                             f"{engine} output cannot be split, use engine 'sharded'")
+        
+        if engine == "sharded":
+            shard_seed = seed if seed is not None else rng.randrange(2 ** 31)
+            # Absolute gap and anomaly counts as a fraction of all rows, also for asset groups
+            total_rows = series_count * total_timesteps
+            shard_gaps = gaps_pct if gaps_pct < 1 else min(gaps_pct / total_rows, 0.99)
+            shard_anomalies = anomalies_pct if anomalies_pct < 1 else min(anomalies_pct / total_rows, 0.99)
+            # One sub-shard in memory at a time: its rows are yielded before the next is generated
+            for group, needed in chunks:
+                group_ids = {asset_id for _, asset_id in group}
+                for sub_first in range(first_idx, last_idx + 1, sub_steps):
+                    rows = self._generate_shard(timestamps, sub_first, min(last_idx, sub_first + sub_steps - 1),
+                                                burn_in_steps, shard_seed,
+                                                customer, site, needed, datapoints, shard_gaps, shard_anomalies,
+                                                anomaly_sev, lag_steps, drift_en, drift_mag, drift_per,
+                                                setpt_chg, setpt_spd, setpt_mag, sens_fail, duration_steps, sens_type,
+                                                group_ids, asset_pairs.index(group[0]))
+                    for row in rows:
+                        yield (
+                            row["customer"],
+                            row["site"],
+                            row["asset_type"],
+                            row["asset_id"],
+                            row["ts"],
+                            row["datapoint"],
+                            row["value"]
+                        )
+            return
+        
+        if engine == "fleet":
+            fleet_seed = seed if seed is not None else rng.randrange(2 ** 31)
+            # One block of timesteps in memory at a time
+            for rows in self._fleet_blocks(timestamps, minutes_per_step, fleet_seed, customer, site, asset_pairs,
+                                           datapoints, gaps_pct, anomalies_pct, anomaly_sev, lag_steps,
+                                           drift_en, drift_mag, drift_per, setpt_chg, setpt_spd, setpt_mag,
+                                           sens_fail, duration_steps, sens_type, fleet):
+                for row in rows:
+                    yield (
+                        row["customer"],
+                        row["site"],
+                        row["asset_type"],
+                        row["asset_id"],
+                        row["ts"],
+                        row["datapoint"],
+                        row["value"]
+                    )
+            return
+        
+        setpoint_schedule = self._plan_setpoints(rng, setpt_chg, total_timesteps, setpt_mag)
         asset_type_correlation = {}
         
         rows = []
@@ -251,24 +860,8 @@ class SyntheticDataGenerator:
                 current_setpoint_offset = 0.0
                 frozen_value = None
                 
-                sensor_failure_periods = []
-                if sens_fail > 0:
-                    actual_failures = rng.randint(0, sens_fail)
-                    if actual_failures > 0:
-                        interval = total_timesteps // (actual_failures + 1)
-                        for i in range(actual_failures):
-                            base_start = (i + 1) * interval
-                            random_offset = rng.randint(-interval // 4, interval // 4)
-                            start_idx = max(0, min(base_start + random_offset, total_timesteps - duration_steps - 1))
-                            actual_duration = rng.randint(duration_steps // 2, duration_steps)
-                            end_idx = min(start_idx + actual_duration, total_timesteps - 1)
-                            
-                            if sens_type == "mixed":
-                                failure_mode = rng.choice(["erratic", "zero", "frozen"])
-                            else:
-                                failure_mode = sens_type
-                            
-                            sensor_failure_periods.append((start_idx, end_idx, failure_mode))
+                sensor_failure_periods = self._plan_sensor_failures(rng, sens_fail, total_timesteps,
+                                                                    duration_steps, sens_type)
                 
                 for ts_idx, ts in enumerate(timestamps):
                     if ts_idx in setpoint_schedule:
@@ -329,42 +922,8 @@ class SyntheticDataGenerator:
                         "value": value,
                     })
         
-        if gaps_pct > 0 and rows:
-            total = len(rows)
-            drop_count = min(int(total * gaps_pct), total - 1)
-            if drop_count > 0:
-                indices = list(range(total))
-                rng.shuffle(indices)
-                keep_mask = set(indices[drop_count:])
-                rows = [r for i, r in enumerate(rows) if i in keep_mask]
-        
-        failure_row_indices = set()
-        if sens_fail > 0:
-            for row_idx, row in enumerate(rows):
-                val = row["value"]
-                if val == 0.0 or abs(val) > 1000:
-                    failure_row_indices.add(row_idx)
-        
-        if anomalies_pct > 0 and rows:
-            valid_indices = [i for i in range(len(rows)) if i not in failure_row_indices]
-            if valid_indices:
-                anomaly_count = min(int(len(valid_indices) * anomalies_pct), len(valid_indices))
-                if anomaly_count > 0:
-                    rng.shuffle(valid_indices)
-                    anomaly_indices = set(valid_indices[:anomaly_count])
-                    
-                    for i in anomaly_indices:
-                        row = rows[i]
-                        datapoint_name = row["datapoint"]
-                        if datapoint_name in datapoints:
-                            mn, mx = datapoints[datapoint_name]
-                            span = mx - mn
-                            current_val = row["value"]
-                            deviation = span * anomaly_sev * rng.uniform(0.5, 1.5)
-                            if rng.random() < 0.5:
-                                row["value"] = current_val + deviation
-                            else:
-                                row["value"] = current_val - deviation
+        rows = self._apply_gaps(rows, gaps_pct, rng)
+        self._apply_anomalies(rows, anomalies_pct, anomaly_sev, sens_fail, datapoints, rng)
         
         for row in rows:
             yield (
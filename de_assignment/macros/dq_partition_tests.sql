@@ -0,0 +1,205 @@
+{% macro dq_partition_results(models, lookback_hours=48, max_gap_hours=48) %}
+
+{#- Partitions after a changed one that are re-evaluated too: a late row can close a hole there -#}
+{%- set lookback_days = ((lookback_hours | float) / 24) | round(0, 'ceil') | int -%}
+
+-- Partition-scoped data test results, see dq_partition_tests.yml
+-- Per tested model: profile the partitions (after the changed_column watermark, if set), keep those
+-- whose grain fingerprint moved since the stored results, widen by the lookback window, evaluate there.
+
+with
+{% for m in models %}
+{%- set relation = ref(m.model) -%}
+{%- set p = m.partition_column -%}
+{%- set changed = m.get('changed_column') -%}
+{%- set gap_hours = m.get('max_gap_hours', max_gap_hours) -%}
+{%- set grain = m.grain | join(', ') -%}
+{%- set series = m.series | join(', ') -%}
+{%- set series_r = 'r.' ~ m.series | join(', r.') -%}
+{%- set cte = 'm' ~ loop.index %}
+
+{{ cte }}_profile as (
+  -- Row count and grain fingerprint per partition
+  select
+    cast(t.{{ p }} as date) as partition_date,
+    count(*) as partition_rows,
+    cast(sum(hash({{ grain }})) as varchar) as partition_fingerprint,
+    {% if changed %}max(t.{{ changed }}){% else %}cast(null as timestamp){% endif %} as source_watermark
+  from {{ relation }} t
+  where t.{{ p }} is not null
+  {%- if changed and is_incremental() %}
+  {%- if changed == p %}
+    -- Event-time watermark: only (whole) partitions from lookback_hours before the latest evaluated
+    -- event on; late rows in there change their partition's fingerprint
+    and t.{{ p }} >= (
+      select cast(cast(dateadd(hour, -{{ lookback_hours }},
+                               coalesce(max(source_watermark), cast('1900-01-01' as timestamp))) as date) as timestamp)
+      from {{ this }}
+      where model_name = '{{ m.model }}'
+    )
+  {%- else %}
+    -- Load watermark: only partitions with rows loaded since the last evaluation, and the lookback
+    -- window after them
+    and exists (
+      select 1
+      from {{ relation }} c
+      where c.{{ changed }} > (
+          select coalesce(max(source_watermark), cast('1900-01-01' as timestamp))
+          from {{ this }}
+          where model_name = '{{ m.model }}'
+        )
+        and cast(t.{{ p }} as date) between cast(c.{{ p }} as date)
+          and dateadd(day, {{ lookback_days }}, cast(c.{{ p }} as date))
+    )
+  {%- endif %}
+  {%- endif %}
+  group by 1
+),
+
+{{ cte }}_changed as (
+  select partition_date
+  from {{ cte }}_profile p
+  {%- if is_incremental() %}
+  where not exists (
+    select 1
+    from {{ this }} r
+    where r.model_name = '{{ m.model }}'
+      and r.partition_date = p.partition_date
+      and r.partition_fingerprint = p.partition_fingerprint
+  )
+  {%- endif %}
+),
+
+{{ cte }}_scope as (
+  -- Changed partitions plus the partitions in the lookback window after them
+  select distinct
+    p.partition_date,
+    p.partition_rows,
+    p.partition_fingerprint,
+    p.source_watermark
+  from {{ cte }}_profile p
+  join {{ cte }}_changed c
+    on p.partition_date between c.partition_date and dateadd(day, {{ lookback_days }}, c.partition_date)
+),
+
+{{ cte }}_rows as (
+  -- Rows the checks read: each scoped partition plus max_gap_hours before it
+  select
+    s.partition_date,
+    t.{{ p }},
+    {%- for column in m.grain if column != p %}
+    t.{{ column }},
+    {%- endfor %}
+    cast(t.{{ p }} as date) = s.partition_date as in_partition
+  from {{ relation }} t
+  join {{ cte }}_scope s
+    on t.{{ p }} >= dateadd(hour, -{{ gap_hours }}, s.partition_date)
+   and t.{{ p }} < dateadd(day, 1, s.partition_date)
+  -- Constant bounds, so the scan is pruned to the scoped partitions before the join
+  where t.{{ p }} >= (select dateadd(hour, -{{ gap_hours }}, min(partition_date)) from {{ cte }}_scope)
+    and t.{{ p }} < (select dateadd(day, 1, max(partition_date)) from {{ cte }}_scope)
+),
+
+{{ cte }}_unique_grain as (
+  -- Grain keys that occur more than once
+  select partition_date, count(*) as failures
+  from (
+    select partition_date
+    from {{ cte }}_rows
+    where in_partition
+    group by partition_date, {{ grain }}
+    having count(*) > 1
+  ) duplicates
+  group by partition_date
+),
+
+{{ cte }}_series as (
+  -- A series without a previous row in the window has none since the window start, unless the
+  -- table starts later
+  select
+    r.in_partition,
+    r.partition_date,
+    r.{{ p }} as event_ts,
+    lead(r.{{ p }}) over (partition by r.partition_date, {{ series_r }} order by r.{{ p }}) as next_ts,
+    lag(r.{{ p }}) over (partition by r.partition_date, {{ series_r }} order by r.{{ p }}) as previous_ts,
+    case when dateadd(hour, -{{ gap_hours }}, r.partition_date) > cast(f.first_partition as timestamp)
+      then dateadd(hour, -{{ gap_hours }}, r.partition_date) end as window_start,
+    max(case when r.in_partition then r.{{ p }} end) over (partition by r.partition_date) as partition_end
+  from {{ cte }}_rows r
+  -- First partition from the profile and the stored results, not from a scan of the table
+  cross join (
+    select min(partition_date) as first_partition
+    from (
+      select partition_date from {{ cte }}_profile
+      {%- if is_incremental() %}
+      union all
+      select partition_date from {{ this }} where model_name = '{{ m.model }}'
+      {%- endif %}
+    ) known
+  ) f
+),
+
+{{ cte }}_no_holes as (
+  -- Gaps longer than max_gap_hours per series that end in the partition, or are still open at the
+  -- partition's latest row
+  select partition_date, count(*) as failures
+  from {{ cte }}_series
+  where (in_partition and datediff(minute, previous_ts, event_ts) > {{ (gap_hours * 60) | int }})
+     -- The previous row lies before the window start, so reaching max_gap_hours means exceeding it
+     or (in_partition and previous_ts is null
+         and datediff(minute, window_start, event_ts) >= {{ (gap_hours * 60) | int }})
+     or (next_ts is null and datediff(minute, event_ts, partition_end) > {{ (gap_hours * 60) | int }})
+  group by partition_date
+),
+{%- if not changed and is_incremental() %}
+
+{{ cte }}_dropped as (
+  -- Stored partitions that no longer have rows
+  select distinct r.partition_date
+  from {{ this }} r
+  where r.model_name = '{{ m.model }}'
+    and r.partition_rows > 0
+    and not exists (select 1 from {{ cte }}_profile p where p.partition_date = r.partition_date)
+),
+{%- endif %}
+
+{{ cte }}_results as (
+  {%- for check in ['unique_grain', 'no_holes'] %}
+  select
+    '{{ m.model }}' as model_name,
+    '{{ check }}' as check_name,
+    s.partition_date,
+    s.partition_rows,
+    s.partition_fingerprint,
+    s.source_watermark,
+    coalesce(f.failures, 0) as failures
+  from {{ cte }}_scope s
+  left join {{ cte }}_{{ check }} f on f.partition_date = s.partition_date
+  {%- if not changed and is_incremental() %}
+  union all
+  select '{{ m.model }}', '{{ check }}', partition_date, 0, cast(null as varchar), cast(null as timestamp), 0
+  from {{ cte }}_dropped
+  {%- endif %}
+  {%- if not loop.last %}
+  union all
+  {%- endif %}
+  {%- endfor %}
+){{ ',' if not loop.last }}
+{%- endfor %}
+
+{% for m in models %}
+select
+  model_name,
+  check_name,
+  partition_date,
+  partition_rows,
+  partition_fingerprint,
+  source_watermark,
+  failures,
+  case when failures > 0 then 'fail' else 'pass' end as status,
+  cast(current_timestamp as timestamp) as evaluated_at
+from m{{ loop.index }}_results
+{% if not loop.last %}union all{% endif %}
+{%- endfor %}
+
+{% endmacro %}
@@ -0,0 +1,108 @@
+{% macro rm_batched_payloads(fact, dim_asset, dim_date,
+                             asset_columns=['asset_type', 'manufacturer', 'model', 'commissioning_date', 'capacity_kw'],
+                             date_columns=['year', 'month', 'day', 'week'],
+                             lookback_days=2) %}
+
+{#- Payload key layout, fixed at compile time and shared by the payload and its change hash -#}
+{%- set block_keys = ['customer_short_code', 'dc_site_code', 'asset_id', 'event_dt'] -%}
+{%- set block_fields = [] -%}
+{%- for column in asset_columns %}{% do block_fields.append(('a', column)) %}{% endfor -%}
+{%- for column in date_columns %}{% do block_fields.append(('d', column)) %}{% endfor %}
+
+-- Batched RM payload builder, see rm_batched_payloads.yml
+-- Dims are joined once per (asset, event_dt) block and the block part of the payload is built there;
+-- each fact row only inserts its datapoint and metric_value into its block's object.
+
+with fact_rows as (
+  select
+    customer_short_code,
+    dc_site_code,
+    asset_id,
+    event_date as event_dt,
+    datapoint,
+    metric_value
+  from {{ fact }}
+  {%- if is_incremental() %}
+  -- Only the last lookback_days of event dates already in {{ this }} and anything newer, so blocks
+  -- and hashes are built for the recent slice instead of the full fact table
+  where event_date >= (
+    select dateadd(day, -{{ lookback_days }}, coalesce(max(event_dt), cast('1900-01-01' as date)))
+    from {{ this }}
+  )
+  {%- endif %}
+),
+
+blocks as (
+  select distinct
+    {{ block_keys | join(',\n    ') }}
+  from fact_rows
+),
+
+block_payloads as (
+  select
+    {%- for key in block_keys %}
+    b.{{ key }},
+    {%- endfor %}
+    hash(
+      {%- for alias, column in block_fields %}
+      {{ alias }}.{{ column }}{{ ',' if not loop.last }}
+      {%- endfor %}
+    ) as block_hash,
+    object_construct_keep_null(
+      {%- for key in block_keys %}
+      '{{ key }}', b.{{ key }},
+      {%- endfor %}
+      {%- for alias, column in block_fields %}
+      '{{ column }}', {{ alias }}.{{ column }}{{ ',' if not loop.last }}
+      {%- endfor %}
+    ) as block_payload
+  from blocks b
+  left join {{ dim_asset }} a
+    on a.customer_short_code = b.customer_short_code
+   and a.dc_site_code = b.dc_site_code
+   and a.asset_id = b.asset_id
+  left join {{ dim_date }} d
+    on d.event_dt = b.event_dt
+),
+
+payload_rows as (
+  select
+    f.customer_short_code,
+    f.dc_site_code,
+    f.asset_id,
+    f.event_dt,
+    f.datapoint,
+    f.metric_value,
+    hash(p.block_hash, f.datapoint, f.metric_value) as payload_input_hash,
+    p.block_payload
+  from fact_rows f
+  join block_payloads p
+    on p.customer_short_code = f.customer_short_code
+   and p.dc_site_code = f.dc_site_code
+   and p.asset_id = f.asset_id
+   and p.event_dt = f.event_dt
+)
+
+select
+  r.customer_short_code,
+  r.dc_site_code,
+  r.asset_id,
+  r.event_dt,
+  r.datapoint,
+  r.metric_value,
+  object_insert(object_insert(r.block_payload, 'datapoint', r.datapoint), 'metric_value', r.metric_value) as json_payload,
+  r.payload_input_hash
+from payload_rows r
+{%- if is_incremental() %}
+-- Only rows that are new or whose fact value or dim attributes changed since the last run
+left join {{ this }} t
+  on t.customer_short_code = r.customer_short_code
+ and t.dc_site_code = r.dc_site_code
+ and t.asset_id = r.asset_id
+ and t.event_dt = r.event_dt
+ and t.datapoint = r.datapoint
+where t.payload_input_hash is null
+   or t.payload_input_hash <> r.payload_input_hash
+{%- endif %}
+
+{% endmacro %}
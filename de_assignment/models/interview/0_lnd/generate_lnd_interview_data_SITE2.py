@@ -1,9 +1,22 @@
+import bisect
+import hashlib
+import json
+import logging
 import math
+import queue
 import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial, reduce
 from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple, Mapping, Sequence
 
 
+_ENGINES = ("legacy", "sharded", "fleet")
+
+
 def _parse_iso_datetime(value: str) -> datetime:
     try:
         return datetime.fromisoformat(value)
@@ -38,8 +51,13 @@ def _iter_datetimes(start: datetime, end: datetime, step: timedelta) -> Iterator
 def _generate_value(ts: datetime, min_value: float, max_value: float, rng: random.Random, 
                     prev_value: Optional[float], trend_state: Dict, start_ts: datetime,
                     drift_enabled: bool, drift_magnitude: float, drift_period_hours: float,
-                    setpoint_offset: float, setpoint_change_speed: float) -> float:
-    """Generate natural-looking time series with trends, momentum, and daily patterns."""
+                    setpoint_offset: float, setpoint_change_speed: float,
+                    drift_level: Optional[float] = None, trend_nudge: Optional[float] = None) -> float:
+    """Generate natural-looking time series with trends, momentum, and daily patterns.
+
+    When ``drift_level`` / ``trend_nudge`` are given (sharded backfill), the long-term drift and
+    the trend nudges come from the precomputed series plan instead of being drawn from ``rng``.
+    """
     mid = (min_value + max_value) / 2.0
     span = (max_value - min_value)
     if span <= 0:
@@ -63,7 +81,9 @@ def _generate_value(ts: datetime, min_value: float, max_value: float, rng: rando
     
     # Long-term drift (multi-day cycles) - configurable
     long_term_component = 0.0
-    if drift_enabled:
+    if drift_level is not None:
+        long_term_component = span * drift_level
+    elif drift_enabled:
         # Calculate hours since start
         hours_elapsed = (ts - start_ts).total_seconds() / 3600.0
         
@@ -99,7 +119,9 @@ def _generate_value(ts: datetime, min_value: float, max_value: float, rng: rando
     setpoint_component = span * trend_state['current_setpoint_offset']
     
     # Smooth trend changes using velocity and acceleration
-    if rng.random() < 0.01:  # 1% chance to nudge trend
+    if trend_nudge is not None:
+        trend_state['trend_velocity'] += span * 0.001 * trend_nudge
+    elif rng.random() < 0.01:  # 1% chance to nudge trend
         trend_state['trend_velocity'] += rng.uniform(-span * 0.001, span * 0.001)
     
     # Apply velocity with strong damping
@@ -143,82 +165,9 @@ def _normalize_datapoints(s: Dict[str, Iterable[float]]) -> Dict[str, Tuple[floa
     return normalized
 
 
-def build_dataframe(session,
-                    params: Mapping,
-                    column_aliases: Mapping[str, str],
-                    default_datapoints: Mapping[str, Sequence[float]],
-                    require_asset_types: bool = False):
-    start = _parse_iso_datetime(str(params.get("start", "2025-01-01")))
-    end = _parse_iso_datetime(str(params.get("end", "2025-01-10")))
-    granularity: str = str(params.get("granularity", "hour")).lower()
-
-    customer = str(params.get("customer", "CG"))
-    site = str(params.get("site", "TEST"))
-
-    raw_datapoints = params.get("datapoints", default_datapoints)
-    datapoints_in: Dict[str, Iterable[float]] = dict(raw_datapoints)
-
-    value_column = str(params.get("value_col", "metric_value"))
-    gaps = float(params.get("gaps", 0.0))
-    anomalies = float(params.get("anomalies", 0.0))
-    anomaly_severity = float(params.get("anomaly_severity", 0.10))
-    correlation_lag_minutes = int(params.get("correlation_lag_minutes", 60))
-    drift_enabled = bool(params.get("drift_enabled", True))
-    drift_magnitude = float(params.get("drift_magnitude", 0.4))
-    drift_period_hours = float(params.get("drift_period_hours", 168.0))
-    setpoint_changes = int(params.get("setpoint_changes", 0))
-    setpoint_change_speed = float(params.get("setpoint_change_speed", 0.15))
-    setpoint_change_magnitude = float(params.get("setpoint_change_magnitude", 0.3))
-    sensor_failures = int(params.get("sensor_failures", 0))
-    sensor_failure_duration_hours = float(params.get("sensor_failure_duration_hours", 12.0))
-    sensor_failure_type = str(params.get("sensor_failure_type", "erratic"))
-    seed_val = params.get("seed", None)
-    seed_int = int(seed_val) if seed_val is not None else None
-
-    if start > end:
-        raise ValueError("start must be <= end")
-
-    # Asset list handling
-    asset_pairs: List[Tuple[str, str]] = []  # (asset_type, asset_id)
-    asset_type_map = params.get("asset_types")
-    if require_asset_types and (not isinstance(asset_type_map, dict) or not asset_type_map):
-        raise ValueError("interview_params.asset_types (dict of asset_type -> [asset_ids]) is required")
-
-    if isinstance(asset_type_map, dict) and asset_type_map:
-        for atype, ids in asset_type_map.items():
-            if not isinstance(ids, (list, tuple)):
-                raise ValueError("Each entry in asset_types must be a list of asset_ids")
-            for asset_id in (ids or []):
-                asset_pairs.append((str(atype), str(asset_id)))
-    else:
-        raw_assets = params.get("asset_ids")
-        if not raw_assets:
-            raise ValueError("Provide either asset_types mapping or asset_ids list")
-        if isinstance(raw_assets, str):
-            asset_ids: List[str] = [a.strip() for a in raw_assets.split(",") if a.strip()]
-        else:
-            asset_ids = list(raw_assets)
-        for aid in asset_ids:
-            inferred_type = (aid.split("-")[0] or "GEN") if "-" in aid else "GEN"
-            asset_pairs.append((inferred_type, aid))
-
-    if not asset_pairs:
-        raise ValueError("No assets provided")
-
-    datapoints = _normalize_datapoints(datapoints_in)
-    rng = random.Random(seed_int)
-    step = _time_step_for(granularity)
-    minutes_per_step = step.total_seconds() / 60
-    
-    # Calculate correlation lag in timesteps
-    lag_steps = max(1, int(correlation_lag_minutes / minutes_per_step))
-
-    rows: List[Dict[str, str]] = []
-    
-    # Calculate setpoint change schedule
-    total_timesteps = len(list(_iter_datetimes(start, end, step)))
+def _plan_setpoints(rng: random.Random, setpoint_changes: int, total_timesteps: int,
+                    setpoint_change_magnitude: float) -> Dict[int, float]:
     setpoint_schedule: Dict[int, float] = {}  # timestep -> offset
-    
     if setpoint_changes > 0:
         # Distribute setpoint changes evenly across time period
         interval = total_timesteps // (setpoint_changes + 1)
@@ -227,127 +176,42 @@ def build_dataframe(session,
             # Random offset within magnitude range
             offset = rng.uniform(-setpoint_change_magnitude, setpoint_change_magnitude)
             setpoint_schedule[change_timestep] = offset
-    
-    # Calculate duration in timesteps for sensor failures
-    step = _time_step_for(granularity)
-    minutes_per_step = step.total_seconds() / 60
-    duration_steps = max(1, int((sensor_failure_duration_hours * 60) / minutes_per_step))
-    
-    # Store time series per asset_type and datapoint for correlation
-    # Key: (asset_type, datapoint_name) -> List[float]
-    asset_type_correlation: Dict[Tuple[str, str], List[float]] = {}
-    
-    # Generate data per asset, with correlation between same asset types
-    for asset_idx, (asset_type, asset_id) in enumerate(asset_pairs):
-        datapoint_names = list(datapoints.keys())
-        
-        for dp_idx, datapoint_name in enumerate(datapoint_names):
-            mn, mx = datapoints[datapoint_name]
-            trend_state: Dict = {}
-            prev_value: Optional[float] = None
-            current_setpoint_offset = 0.0
-            frozen_value: Optional[float] = None
-            
-            # Generate unique sensor failure schedule for this asset+datapoint combination
-            sensor_failure_periods: List[Tuple[int, int, str]] = []
-            if sensor_failures > 0:
-                # Randomly decide how many failures this sensor will have (0 to max)
-                actual_failures = rng.randint(0, sensor_failures)
-                
-                if actual_failures > 0:
-                    # Use different intervals per asset/datapoint to avoid synchronization
-                    interval = total_timesteps // (actual_failures + 1)
-                    
-                    for i in range(actual_failures):
-                        # Add randomness to start time so not all sensors fail at same time
-                        base_start = (i + 1) * interval
-                        random_offset = rng.randint(-interval // 4, interval // 4)
-                        start_idx = max(0, min(base_start + random_offset, total_timesteps - duration_steps - 1))
-                        
-                        # Randomize duration (50% to 100% of max duration)
-                        actual_duration = rng.randint(duration_steps // 2, duration_steps)
-                        end_idx = min(start_idx + actual_duration, total_timesteps - 1)
-                        
-                        # Determine failure type
-                        if sensor_failure_type == "mixed":
-                            failure_mode = rng.choice(["erratic", "zero", "frozen"])
-                        else:
-                            failure_mode = sensor_failure_type
-                        
-                        sensor_failure_periods.append((start_idx, end_idx, failure_mode))
-            
-            for ts_idx, ts in enumerate(_iter_datetimes(start, end, step)):
-                # Check if there's a setpoint change at this timestep
-                if ts_idx in setpoint_schedule:
-                    current_setpoint_offset = setpoint_schedule[ts_idx]
-                
-                # Check if we're in a sensor failure period
-                in_failure = False
-                failure_mode = None
-                for start_fail, end_fail, mode in sensor_failure_periods:
-                    if start_fail <= ts_idx <= end_fail:
-                        in_failure = True
-                        failure_mode = mode
-                        break
-                
-                if in_failure:
-                    # Apply sensor failure behavior
-                    if failure_mode == "zero":
-                        value = 0.0
-                    elif failure_mode == "frozen":
-                        if frozen_value is None:
-                            # Freeze at current value
-                            frozen_value = prev_value if prev_value is not None else (mn + mx) / 2
-                        value = frozen_value
-                    elif failure_mode == "erratic":
-                        # Wild fluctuations across entire possible range
-                        span = mx - mn
-                        value = rng.uniform(mn - span * 0.5, mx + span * 0.5)
-                    else:
-                        value = _generate_value(ts, mn, mx, rng, prev_value, trend_state, start,
-                                               drift_enabled, drift_magnitude, drift_period_hours,
-                                               current_setpoint_offset, setpoint_change_speed)
+    return setpoint_schedule
+
+
+def _plan_sensor_failures(rng: random.Random, sensor_failures: int, total_timesteps: int,
+                          duration_steps: int, sensor_failure_type: str) -> List[Tuple[int, int, str]]:
+    # Generate unique sensor failure schedule for one asset+datapoint combination
+    sensor_failure_periods: List[Tuple[int, int, str]] = []
+    if sensor_failures > 0:
+        # Randomly decide how many failures this sensor will have (0 to max)
+        actual_failures = rng.randint(0, sensor_failures)
+
+        if actual_failures > 0:
+            # Use different intervals per asset/datapoint to avoid synchronization
+            interval = total_timesteps // (actual_failures + 1)
+
+            for i in range(actual_failures):
+                # Add randomness to start time so not all sensors fail at same time
+                base_start = (i + 1) * interval
+                random_offset = rng.randint(-interval // 4, interval // 4)
+                start_idx = max(0, min(base_start + random_offset, total_timesteps - duration_steps - 1))
+
+                # Randomize duration (50% to 100% of max duration)
+                actual_duration = rng.randint(duration_steps // 2, duration_steps)
+                end_idx = min(start_idx + actual_duration, total_timesteps - 1)
+
+                # Determine failure type
+                if sensor_failure_type == "mixed":
+                    failure_mode = rng.choice(["erratic", "zero", "frozen"])
                 else:
-                    # Normal operation
-                    frozen_value = None  # Reset frozen value when failure ends
-                    value = _generate_value(ts, mn, mx, rng, prev_value, trend_state, start,
-                                           drift_enabled, drift_magnitude, drift_period_hours,
-                                           current_setpoint_offset, setpoint_change_speed)
-                    
-                    # Apply correlation from first asset of same type (not first datapoint)
-                    correlation_key = (asset_type, datapoint_name)
-                    if correlation_key in asset_type_correlation:
-                        # This is not the first asset of this type - correlate with it
-                        source_series = asset_type_correlation[correlation_key]
-                        # Look back by lag_steps
-                        source_idx = ts_idx - lag_steps
-                        if 0 <= source_idx < len(source_series):
-                            # Get normalized position of source value in its range
-                            source_val = source_series[source_idx]
-                            source_normalized = (source_val - mn) / (mx - mn) if mx > mn else 0.5
-                            
-                            # Apply correlation: blend current value with correlated target
-                            target_val = mn + (mx - mn) * source_normalized
-                            value = value * 0.7 + target_val * 0.3  # 30% correlation strength
-                
-                # Store this asset's values as correlation source for other assets of same type
-                correlation_key = (asset_type, datapoint_name)
-                if correlation_key not in asset_type_correlation:
-                    asset_type_correlation[correlation_key] = []
-                if len(asset_type_correlation[correlation_key]) == ts_idx:
-                    asset_type_correlation[correlation_key].append(value)
-                
-                prev_value = value
-                rows.append({
-                    "customer": customer,
-                    "site": site,
-                    "asset_type": asset_type,
-                    "asset_id": asset_id,
-                    "ts": ts.strftime("%Y-%m-%d %H:%M:%S"),
-                    "datapoint": datapoint_name,
-                    "value": f"{value:.3f}",
-                })
+                    failure_mode = sensor_failure_type
+
+                sensor_failure_periods.append((start_idx, end_idx, failure_mode))
+    return sensor_failure_periods
 
+
+def _apply_gaps(rows: List[Dict[str, str]], gaps: float, rng: random.Random) -> List[Dict[str, str]]:
     # Apply gaps (remove rows)
     if gaps > 0 and rows:
         total = len(rows)
@@ -357,7 +221,12 @@ def build_dataframe(session,
             rng.shuffle(indices)
             keep_mask = set(indices[drop_count:])
             rows = [r for i, r in enumerate(rows) if i in keep_mask]
-    
+    return rows
+
+
+def _apply_anomalies(rows: List[Dict[str, str]], anomalies: float, anomaly_severity: float,
+                     sensor_failures: int, datapoints: Mapping[str, Tuple[float, float]],
+                     rng: random.Random) -> None:
     # Build a set of row indices that are in sensor failure periods
     # We'll exclude these from anomaly injection
     failure_row_indices = set()
@@ -367,41 +236,43 @@ def build_dataframe(session,
             val = float(row["value"])
             if val == 0.0 or abs(val) > 1000:  # Simple heuristic for failure detection
                 failure_row_indices.add(row_idx)
-    
+
     # Apply anomalies (subtle deviations from expected sequence)
     # But NOT during sensor failures
     if anomalies > 0 and rows:
         # Filter out indices that are in failure periods
         valid_indices = [i for i in range(len(rows)) if i not in failure_row_indices]
-        
+
         if valid_indices:
             anomaly_count = min(int(len(valid_indices) * anomalies) if anomalies < 1 else int(round(anomalies)), len(valid_indices))
             if anomaly_count > 0:
                 rng.shuffle(valid_indices)
                 anomaly_indices = set(valid_indices[:anomaly_count])
-                
+
                 for i in anomaly_indices:
                     row = rows[i]
                     datapoint_name = row["datapoint"]
-                    
+
                     # Find the min/max for this datapoint
                     if datapoint_name in datapoints:
                         mn, mx = datapoints[datapoint_name]
                         span = mx - mn
                         current_val = float(row["value"])
-                        
+
                         # Generate anomaly using configurable severity
                         # Severity is fraction of range (e.g., 0.05 = 5% of range)
                         deviation = span * anomaly_severity * rng.uniform(0.5, 1.5)
-                        
+
                         # Randomly go up or down
                         if rng.random() < 0.5:
                             anomaly_val = current_val + deviation
                         else:
                             anomaly_val = current_val - deviation
-                        
+
                         row["value"] = f"{anomaly_val:.3f}"
 
+
+def _rows_to_matrix(rows: List[Dict[str, str]], column_aliases: Mapping[str, str]) -> Tuple[List[str], List[List[str]]]:
     # Build output rows using column aliases mapping from internal keys
     # Known internal keys: customer, site, asset_type, asset_id, ts, datapoint, value
     output_columns: List[str] = []
@@ -420,13 +291,1270 @@ def build_dataframe(session,
             else:
                 out_row.append(r[internal_key])
         data_matrix.append(out_row)
+    return output_columns, data_matrix
+
 
+def _rows_to_dataframe(session, rows: List[Dict[str, str]], column_aliases: Mapping[str, str]):
+    output_columns, data_matrix = _rows_to_matrix(rows, column_aliases)
     df = session.create_dataframe(data_matrix, schema=output_columns)
     return df
 
 
+# ---------------------------------------------------------------------------
+# Sharded backfill
+#
+# The legacy loop walks every series from `start` with one shared RNG, so a long
+# range can only be generated sequentially. The backfill planner splits the
+# timeline into shards that can run concurrently. Everything that must line up
+# across shard boundaries (setpoint schedule, sensor failures, long-term drift,
+# trend nudges) is planned once over the full timeline from seed-derived RNGs;
+# the noise stream is keyed by absolute timestep (one RNG per block of
+# _NOISE_BLOCK_STEPS), so overlapping shards see identical noise. The remaining
+# short-memory state (smoothed base value, setpoint approach, correlation
+# lookback) is warmed up over a burn-in window before each shard start, where it
+# converges onto the neighbouring shard, and the burn-in rows are discarded.
+# The burn-in is at least _BURN_IN_MIN_STEPS and long enough for the carried-over
+# error to decay below the noise level (_burn_in_settle_steps), whatever
+# burn_in_hours amounts to at the configured granularity.
+# ---------------------------------------------------------------------------
+
+_NOISE_BLOCK_STEPS = 4096
+_BURN_IN_MIN_STEPS = 200
+
+
+def _burn_in_settle_steps(lag_steps: int) -> int:
+    """Steps until a start-up error in the smoothed value has decayed below the noise SD.
+
+    A leader's error follows e[t] = 0.7 * 0.85 * e[t-1] + 0.3 * e[t-lag] (smoothing, then the blend
+    with its own lagged value); it starts at up to half the span, the noise SD is 0.8% of the span.
+    Followers decay faster and inherit the leader's error scaled by 0.3.
+    """
+    threshold = 0.008 / 0.5
+    history = [1.0] * lag_steps
+    steps = 0
+    while max(abs(e) for e in history[-lag_steps:]) >= threshold:
+        history.append(0.7 * 0.85 * history[-1] + 0.3 * history[-lag_steps])
+        steps += 1
+    return steps
+
+def _plan_drift(rng: random.Random, total_timesteps: int, drift_magnitude: float,
+                drift_period_hours: float) -> Dict[str, List]:
+    """Precompute the long-term drift walk as segments of constant direction.
+
+    Mirrors the walk in ``_generate_value`` (one direction change roughly every
+    ``drift_period_hours`` timesteps, ±20% jitter) but draws the jitter once per
+    segment, so the drift level at any timestep is known without replaying the series.
+    """
+    period = max(1, int(drift_period_hours))
+    period_variance = int(period * 0.2)
+    drift_speed = drift_magnitude / (period * 2)
+    starts: List[int] = []
+    levels: List[float] = []
+    directions: List[int] = []
+    idx = 0
+    level = 0.0
+    direction = rng.choice([-1, 1])
+    while idx < total_timesteps:
+        starts.append(idx)
+        levels.append(level)
+        directions.append(direction)
+        length = period + 1 + rng.randint(-period_variance, period_variance)
+        level = max(-drift_magnitude, min(drift_magnitude, level + direction * drift_speed * length))
+        idx += length
+        direction *= -1
+    return {"starts": starts, "levels": levels, "directions": directions, "speed": drift_speed}
+
+
+def _drift_level_at(drift_plan: Mapping, ts_idx: int, drift_magnitude: float) -> float:
+    seg = bisect.bisect_right(drift_plan["starts"], ts_idx) - 1
+    level = (drift_plan["levels"][seg]
+             + drift_plan["directions"][seg] * drift_plan["speed"] * (ts_idx - drift_plan["starts"][seg] + 1))
+    return max(-drift_magnitude, min(drift_magnitude, level))
+
+
+def _plan_trend_nudges(rng: random.Random, total_timesteps: int) -> Dict[str, List]:
+    """Precompute the sparse trend nudges (1% of timesteps, size in [-1, 1] x 0.1% of range)."""
+    steps: List[int] = []
+    nudges: List[float] = []
+    idx = -1
+    while True:
+        # Geometric gap between nudges, same rate as the per-step 1% draw in _generate_value
+        idx += 1 + int(math.log(1.0 - rng.random()) / math.log(0.99))
+        if idx >= total_timesteps:
+            break
+        steps.append(idx)
+        nudges.append(rng.uniform(-1.0, 1.0))
+    return {"steps": steps, "nudges": nudges}
+
+
+def _trend_state_before(trend_plan: Mapping, ts_idx: int, span: float) -> Tuple[float, float]:
+    """Closed-form (trend, trend_velocity) just before ``ts_idx`` from the planned nudges.
+
+    Sums each nudge's impulse response under the velocity damping (0.98) and trend mean
+    reversion (0.999) of _generate_value; nudges older than ~20k steps contribute < 1e-8.
+    """
+    ratio = 0.98 / 0.999
+    trend = 0.0
+    velocity = 0.0
+    lo = bisect.bisect_left(trend_plan["steps"], ts_idx - 20000)
+    hi = bisect.bisect_left(trend_plan["steps"], ts_idx)
+    for k in range(lo, hi):
+        n = ts_idx - 1 - trend_plan["steps"][k]
+        nudge = span * 0.001 * trend_plan["nudges"][k]
+        trend += nudge * 0.999 ** (n + 1) * (1.0 - ratio ** (n + 1)) / (1.0 - ratio)
+        velocity += nudge * 0.98 ** (n + 1)
+    limit = span * 0.25
+    return max(-limit, min(limit, trend)), velocity
+
+
+def _setpoint_offset_before(setpoint_schedule: Mapping[int, float], ts_idx: int) -> float:
+    active = [idx for idx in setpoint_schedule if idx < ts_idx]
+    return setpoint_schedule[max(active)] if active else 0.0
+
+
+def _noise_rng(seed: int, asset_id: str, datapoint_name: str, ts_idx: int) -> random.Random:
+    """Noise RNG for one series positioned at ``ts_idx`` (one gauss draw per timestep)."""
+    block = ts_idx // _NOISE_BLOCK_STEPS
+    rng = random.Random(f"{seed}:{asset_id}:{datapoint_name}:noise{block}")
+    for _ in range(ts_idx - block * _NOISE_BLOCK_STEPS):
+        rng.gauss(0.0, 1.0)
+    return rng
+
+
+def _plan_backfill_shards(total_timesteps: int, shard_steps: int, burn_in_steps: int) -> List[Tuple[int, int, int]]:
+    """Split the timeline into (first_idx, last_idx, warm_idx) shards; warm_idx is where burn-in starts."""
+    shards: List[Tuple[int, int, int]] = []
+    for first_idx in range(0, total_timesteps, shard_steps):
+        last_idx = min(first_idx + shard_steps, total_timesteps) - 1
+        shards.append((first_idx, last_idx, max(0, first_idx - burn_in_steps)))
+    return shards
+
+
+def _generate_shard(spec: Mapping, shard: Tuple[int, int, int]) -> List[Dict[str, str]]:
+    """Generate all series for one time shard, including burn-in, and return the shard's rows.
+
+    With ``output_ids`` in the spec, only those assets' rows are returned (the others are correlation
+    sources), and gaps and anomalies are drawn per asset group, keyed by ``group_index``.
+    """
+    first_idx, last_idx, warm_idx = shard
+    seed = spec["seed"]
+    output_ids = spec.get("output_ids")
+    start: datetime = spec["start"]
+    step: timedelta = spec["step"]
+    drift_magnitude = spec["drift_magnitude"]
+    lag_steps = spec["lag_steps"]
+    setpoint_schedule = spec["setpoint_schedule"]
+
+    rows: List[Dict[str, str]] = []
+    # Key: (asset_type, datapoint_name) -> (first ts_idx, values from that ts_idx on)
+    asset_type_correlation: Dict[Tuple[str, str], Tuple[int, List[float]]] = {}
+
+    for asset_type, asset_id in spec["asset_pairs"]:
+        for datapoint_name, (mn, mx) in spec["datapoints"].items():
+            plan = spec["series_plans"][(asset_id, datapoint_name)]
+            sensor_failure_periods = plan["failures"]
+            rng = random.Random(f"{seed}:{asset_id}:{datapoint_name}:shard{first_idx}")
+
+            # Never start warming up inside a failure: a frozen sensor must freeze at the
+            # same value in every shard it spans.
+            series_warm_idx = warm_idx
+            moved = True
+            while moved:
+                moved = False
+                for start_fail, end_fail, _ in sensor_failure_periods:
+                    if 0 < start_fail <= series_warm_idx <= end_fail:
+                        series_warm_idx = max(0, start_fail - spec["burn_in_steps"])
+                        moved = True
+
+            current_setpoint_offset = _setpoint_offset_before(setpoint_schedule, series_warm_idx)
+            trend, trend_velocity = _trend_state_before(plan["trend"], series_warm_idx, mx - mn)
+            trend_nudges = dict(zip(plan["trend"]["steps"], plan["trend"]["nudges"]))
+            trend_state: Dict = {
+                'trend': trend,
+                'trend_velocity': trend_velocity,
+                'base_value': (mn + mx) / 2.0,
+                'current_setpoint_offset': current_setpoint_offset,
+            }
+            prev_value: Optional[float] = None
+            frozen_value: Optional[float] = None
+            correlation_key = (asset_type, datapoint_name)
+            leader = correlation_key not in asset_type_correlation
+            series_values: List[float] = []
+            # As in legacy, the first asset of a type correlates with its own lagged values
+            source = (series_warm_idx, series_values) if leader else asset_type_correlation[correlation_key]
+            noise_rng = _noise_rng(seed, asset_id, datapoint_name, series_warm_idx)
+
+            for ts_idx in range(series_warm_idx, last_idx + 1):
+                ts = start + step * ts_idx
+                if ts_idx % _NOISE_BLOCK_STEPS == 0:
+                    noise_rng = _noise_rng(seed, asset_id, datapoint_name, ts_idx)
+                if ts_idx in setpoint_schedule:
+                    current_setpoint_offset = setpoint_schedule[ts_idx]
+
+                failure_mode = None
+                for start_fail, end_fail, mode in sensor_failure_periods:
+                    if start_fail <= ts_idx <= end_fail:
+                        failure_mode = mode
+                        break
+
+                drift_level = (_drift_level_at(plan["drift"], ts_idx, drift_magnitude)
+                               if plan["drift"] is not None else None)
+                if failure_mode in ("zero", "frozen", "erratic"):
+                    # Keep the noise stream aligned to timesteps while the sensor is down
+                    noise_rng.gauss(0.0, 1.0)
+                if failure_mode == "zero":
+                    value = 0.0
+                elif failure_mode == "frozen":
+                    if frozen_value is None:
+                        frozen_value = prev_value if prev_value is not None else (mn + mx) / 2
+                    value = frozen_value
+                elif failure_mode == "erratic":
+                    span = mx - mn
+                    value = rng.uniform(mn - span * 0.5, mx + span * 0.5)
+                else:
+                    # With the drift level and trend nudge supplied, the only draw left in
+                    # _generate_value is the per-timestep noise
+                    value = _generate_value(ts, mn, mx, noise_rng, prev_value, trend_state, start,
+                                            False, drift_magnitude, spec["drift_period_hours"],
+                                            current_setpoint_offset, spec["setpoint_change_speed"],
+                                            drift_level=drift_level,
+                                            trend_nudge=trend_nudges.get(ts_idx, 0.0))
+                if failure_mode is None:
+                    frozen_value = None
+                    if source is not None:
+                        source_idx = ts_idx - lag_steps - source[0]
+                        if 0 <= source_idx < len(source[1]):
+                            source_normalized = (source[1][source_idx] - mn) / (mx - mn) if mx > mn else 0.5
+                            target_val = mn + (mx - mn) * source_normalized
+                            value = value * 0.7 + target_val * 0.3
+
+                if leader:
+                    series_values.append(value)
+                prev_value = value
+                if ts_idx >= first_idx and (output_ids is None or asset_id in output_ids):
+                    rows.append({
+                        "customer": spec["customer"],
+                        "site": spec["site"],
+                        "asset_type": asset_type,
+                        "asset_id": asset_id,
+                        "ts": ts.strftime("%Y-%m-%d %H:%M:%S"),
+                        "datapoint": datapoint_name,
+                        "value": f"{value:.3f}",
+                    })
+
+            if leader:
+                asset_type_correlation[correlation_key] = source
+
+    post_rng = random.Random(f"{seed}:shard{first_idx}:group{spec.get('group_index', 0)}:post")
+    rows = _apply_gaps(rows, spec["gaps"], post_rng)
+    _apply_anomalies(rows, spec["anomalies"], spec["anomaly_severity"], spec["sensor_failures"],
+                     spec["datapoints"], post_rng)
+    return rows
+
+
+def _run_backfill(spec: Mapping, shards: List[Tuple[int, int, int]], workers: int) -> List[Dict[str, str]]:
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_rows = list(pool.map(partial(_generate_shard, spec), shards))
+    else:
+        shard_rows = [_generate_shard(spec, shard) for shard in shards]
+    rows: List[Dict[str, str]] = []
+    for chunk in shard_rows:
+        rows.extend(chunk)
+    return rows
+
+
+def _resolve_config(params: Mapping,
+                    default_datapoints: Mapping[str, Sequence[float]],
+                    require_asset_types: bool = False) -> Dict:
+    """Parse and validate ``interview_params`` into the settings shared by all engines."""
+    start = _parse_iso_datetime(str(params.get("start", "2025-01-01")))
+    end = _parse_iso_datetime(str(params.get("end", "2025-01-10")))
+    granularity: str = str(params.get("granularity", "hour")).lower()
+
+    customer = str(params.get("customer", "CG"))
+    site = str(params.get("site", "TEST"))
+
+    raw_datapoints = params.get("datapoints", default_datapoints)
+    datapoints_in: Dict[str, Iterable[float]] = dict(raw_datapoints)
+
+    seed_val = params.get("seed", None)
+
+    backfill = params.get("backfill") or {}
+    if not isinstance(backfill, Mapping):
+        raise ValueError("interview_params.backfill must be a mapping (shard_hours, burn_in_hours, workers)")
+    # "legacy" keeps the original draw order from one shared random.Random(seed), so existing
+    # datasets reproduce exactly per seed (guarded by tools/lnd_equivalence.py). Other engines
+    # draw differently and are only held to the same statistical properties.
+    engine = str(params.get("engine", "sharded" if backfill else "legacy")).lower()
+    if engine not in _ENGINES:
+        raise ValueError(f"engine must be one of: {', '.join(_ENGINES)}")
+    if engine != "sharded" and backfill:
+        raise ValueError("interview_params.backfill requires engine: sharded")
+
+    fleet = params.get("fleet") or {}
+    if not isinstance(fleet, Mapping):
+        raise ValueError("interview_params.fleet must be a mapping (asset_correlation, datapoint_correlation, "
+                         "lag_spread, disturbance, persistence_hours)")
+    if fleet and engine != "fleet":
+        raise ValueError("interview_params.fleet requires engine: fleet")
+    fleet_settings = {
+        "asset_correlation": float(fleet.get("asset_correlation", 0.6)),
+        "datapoint_correlation": float(fleet.get("datapoint_correlation", 0.3)),
+        "lag_spread": float(fleet.get("lag_spread", 1.0)),
+        "disturbance": float(fleet.get("disturbance", 0.05)),
+        "persistence_hours": float(fleet.get("persistence_hours", 6.0)),
+    }
+    for key in ("asset_correlation", "datapoint_correlation"):
+        if not 0.0 <= fleet_settings[key] < 1.0:
+            raise ValueError(f"interview_params.fleet.{key} must be in [0, 1)")
+    if fleet_settings["persistence_hours"] <= 0:
+        raise ValueError("interview_params.fleet.persistence_hours must be > 0")
+
+    limits = params.get("limits") or {}
+    if not isinstance(limits, Mapping):
+        raise ValueError("interview_params.limits must be a mapping (max_rows, max_memory_mb, max_output_mb, "
+                         "max_runtime_minutes, on_exceed)")
+    on_exceed = str(limits.get("on_exceed", "reject")).lower()
+    if on_exceed not in ("reject", "shard"):
+        raise ValueError("interview_params.limits.on_exceed must be 'reject' or 'shard'")
+
+    pipeline = params.get("pipeline")
+    if pipeline is not None and not isinstance(pipeline, Mapping):
+        raise ValueError("interview_params.pipeline must be a mapping (uploaders, queue_batches, batch_rows, "
+                         "retries, retry_backoff_seconds)")
+
+    if start > end:
+        raise ValueError("start must be <= end")
+
+    # Asset list handling
+    asset_pairs: List[Tuple[str, str]] = []  # (asset_type, asset_id)
+    asset_type_map = params.get("asset_types")
+    if require_asset_types and (not isinstance(asset_type_map, dict) or not asset_type_map):
+        raise ValueError("interview_params.asset_types (dict of asset_type -> [asset_ids]) is required")
+
+    if isinstance(asset_type_map, dict) and asset_type_map:
+        for atype, ids in asset_type_map.items():
+            if not isinstance(ids, (list, tuple)):
+                raise ValueError("Each entry in asset_types must be a list of asset_ids")
+            for asset_id in (ids or []):
+                asset_pairs.append((str(atype), str(asset_id)))
+    else:
+        raw_assets = params.get("asset_ids")
+        if not raw_assets:
+            raise ValueError("Provide either asset_types mapping or asset_ids list")
+        if isinstance(raw_assets, str):
+            asset_ids: List[str] = [a.strip() for a in raw_assets.split(",") if a.strip()]
+        else:
+            asset_ids = list(raw_assets)
+        for aid in asset_ids:
+            inferred_type = (aid.split("-")[0] or "GEN") if "-" in aid else "GEN"
+            asset_pairs.append((inferred_type, aid))
+
+    if not asset_pairs:
+        raise ValueError("No assets provided")
+
+    step = _time_step_for(granularity)
+    minutes_per_step = step.total_seconds() / 60
+    correlation_lag_minutes = int(params.get("correlation_lag_minutes", 60))
+    sensor_failure_duration_hours = float(params.get("sensor_failure_duration_hours", 12.0))
+
+    return {
+        "start": start,
+        "end": end,
+        "step": step,
+        "minutes_per_step": minutes_per_step,
+        "total_timesteps": len(list(_iter_datetimes(start, end, step))),
+        "customer": customer,
+        "site": site,
+        "asset_pairs": asset_pairs,
+        "datapoints": _normalize_datapoints(datapoints_in),
+        "value_column": str(params.get("value_col", "metric_value")),
+        "gaps": float(params.get("gaps", 0.0)),
+        "anomalies": float(params.get("anomalies", 0.0)),
+        "anomaly_severity": float(params.get("anomaly_severity", 0.10)),
+        # Calculate correlation lag in timesteps
+        "lag_steps": max(1, int(correlation_lag_minutes / minutes_per_step)),
+        "drift_enabled": bool(params.get("drift_enabled", True)),
+        "drift_magnitude": float(params.get("drift_magnitude", 0.4)),
+        "drift_period_hours": float(params.get("drift_period_hours", 168.0)),
+        "setpoint_changes": int(params.get("setpoint_changes", 0)),
+        "setpoint_change_speed": float(params.get("setpoint_change_speed", 0.15)),
+        "setpoint_change_magnitude": float(params.get("setpoint_change_magnitude", 0.3)),
+        "sensor_failures": int(params.get("sensor_failures", 0)),
+        # Calculate duration in timesteps for sensor failures
+        "duration_steps": max(1, int((sensor_failure_duration_hours * 60) / minutes_per_step)),
+        "sensor_failure_type": str(params.get("sensor_failure_type", "erratic")),
+        "seed": int(seed_val) if seed_val is not None else None,
+        "engine": engine,
+        "backfill": backfill,
+        "fleet": fleet_settings,
+        "limits": {key: float(limits[key]) for key in _LIMIT_KEYS if limits.get(key) is not None},
+        "on_exceed": on_exceed,
+        "dry_run": bool(params.get("dry_run", False)),
+        "pipeline": None if pipeline is None else {
+            "uploaders": max(1, int(pipeline.get("uploaders", 4))),
+            "queue_batches": max(1, int(pipeline.get("queue_batches", 2))),
+            "batch_rows": max(1, int(pipeline.get("batch_rows", 250000))),
+            "retries": max(0, int(pipeline.get("retries", 3))),
+            "retry_backoff_seconds": float(pipeline.get("retry_backoff_seconds", 1.0)),
+        },
+    }
+
+
+def _backfill_settings(cfg: Mapping) -> Tuple[int, int, int]:
+    """(shard_steps, burn_in_steps, workers) of the sharded engine."""
+    minutes_per_step = cfg["minutes_per_step"]
+    backfill = cfg["backfill"]
+    shard_steps = max(1, int(float(backfill.get("shard_hours", 720)) * 60 / minutes_per_step))
+    # Burn-in must at least cover the correlation lag so followers see their leader's lagged values,
+    # and let the smoothed state settle however few steps burn_in_hours is at this granularity
+    burn_in_steps = max(cfg["lag_steps"], int(float(backfill.get("burn_in_hours", 48)) * 60 / minutes_per_step),
+                        _burn_in_settle_steps(cfg["lag_steps"]), _BURN_IN_MIN_STEPS)
+    workers = max(1, int(backfill.get("workers", 1)))
+    return shard_steps, burn_in_steps, workers
+
+
+def _sharded_spec(cfg: Mapping) -> Dict:
+    """Everything _generate_shard needs, with per-series plans derived from the (resolved) seed."""
+    total_timesteps = cfg["total_timesteps"]
+    _, burn_in_steps, _ = _backfill_settings(cfg)
+    base_seed = cfg["seed"] if cfg["seed"] is not None else random.Random().randrange(2 ** 31)
+    total_rows = total_timesteps * len(cfg["asset_pairs"]) * len(cfg["datapoints"])
+    gaps = cfg["gaps"]
+    anomalies = cfg["anomalies"]
+
+    series_plans: Dict[Tuple[str, str], Dict] = {}
+    for _, asset_id in cfg["asset_pairs"]:
+        for datapoint_name in cfg["datapoints"]:
+            series_plans[(asset_id, datapoint_name)] = {
+                "failures": _plan_sensor_failures(
+                    random.Random(f"{base_seed}:{asset_id}:{datapoint_name}:failures"),
+                    cfg["sensor_failures"], total_timesteps, cfg["duration_steps"], cfg["sensor_failure_type"]),
+                "drift": _plan_drift(
+                    random.Random(f"{base_seed}:{asset_id}:{datapoint_name}:drift"),
+                    total_timesteps, cfg["drift_magnitude"], cfg["drift_period_hours"]) if cfg["drift_enabled"] else None,
+                "trend": _plan_trend_nudges(
+                    random.Random(f"{base_seed}:{asset_id}:{datapoint_name}:trend"), total_timesteps),
+            }
+
+    spec = {
+        "seed": base_seed,
+        "customer": cfg["customer"],
+        "site": cfg["site"],
+        "start": cfg["start"],
+        "step": cfg["step"],
+        "asset_pairs": cfg["asset_pairs"],
+        "datapoints": cfg["datapoints"],
+        # Absolute counts (>= 1) are spread over the shards as a fraction of all rows
+        "gaps": gaps if gaps < 1 else min(gaps / total_rows, 0.99),
+        "anomalies": anomalies if anomalies < 1 else min(anomalies / total_rows, 0.99),
+        "anomaly_severity": cfg["anomaly_severity"],
+        "sensor_failures": cfg["sensor_failures"],
+        "lag_steps": cfg["lag_steps"],
+        "burn_in_steps": burn_in_steps,
+        "drift_magnitude": cfg["drift_magnitude"],
+        "drift_period_hours": cfg["drift_period_hours"],
+        "setpoint_schedule": _plan_setpoints(random.Random(f"{base_seed}:setpoints"), cfg["setpoint_changes"],
+                                             total_timesteps, cfg["setpoint_change_magnitude"]),
+        "setpoint_change_speed": cfg["setpoint_change_speed"],
+        "series_plans": series_plans,
+    }
+    return spec
+
+
+def _generate_sharded(cfg: Mapping) -> List[Dict[str, str]]:
+    shard_steps, burn_in_steps, workers = _backfill_settings(cfg)
+    shards = _plan_backfill_shards(cfg["total_timesteps"], shard_steps, burn_in_steps)
+    return _run_backfill(_sharded_spec(cfg), shards, workers)
+
+
+def _generate_chunk(spec: Mapping, chunk: Mapping) -> List[Dict[str, str]]:
+    """Rows of one planned chunk (asset group x time shard) of a sharded run."""
+    group = set(chunk["asset_pairs"])
+    # Followers need their type's first asset as correlation source, so it is generated alongside
+    leaders: Dict[str, Tuple[str, str]] = {}
+    for pair in spec["asset_pairs"]:
+        leaders.setdefault(pair[0], pair)
+    needed = group | {leaders[asset_type] for asset_type, _ in group}
+    chunk_spec = dict(spec, asset_pairs=[pair for pair in spec["asset_pairs"] if pair in needed],
+                      output_ids={asset_id for _, asset_id in group},
+                      group_index=spec["asset_pairs"].index(chunk["asset_pairs"][0]))
+    return _generate_shard(chunk_spec, chunk["shard"])
+
+
+# ---------------------------------------------------------------------------
+# Fleet engine
+#
+# The other engines pull each follower 30% towards the lagged series of the
+# first asset of its type, one lookup per row, and every asset of a type hangs
+# off that single leader. The fleet engine instead gives every series an AR(1)
+# disturbance driven by correlated innovations: per asset type, one block of
+# standard normals for all its series is multiplied by the Cholesky factors of
+# an equicorrelated asset matrix and datapoint matrix (the covariance is their
+# Kronecker product), factorized once per run. Asset k of a type sees the
+# innovations k/(n-1) * lag_spread * correlation lag later than the first one.
+# The rest of _generate_value (daily pattern, drift, setpoints, trend,
+# smoothing, noise) and the sensor failures are evaluated for all series at
+# once per timestep, with the per-series plans of the sharded engine.
+# ---------------------------------------------------------------------------
+
+_FLEET_BLOCK_STEPS = 4096
+_FAILURE_CODES = {"zero": 1, "frozen": 2, "erratic": 3}
+
+
+def _equicorrelation_factor(np, size: int, rho: float):
+    """Lower Cholesky factor of the size x size matrix with 1 on the diagonal and rho elsewhere."""
+    return np.linalg.cholesky(np.full((size, size), rho) + (1.0 - rho) * np.eye(size))
+
+
+def _iter_fleet_blocks(cfg: Mapping) -> Iterator[List[Dict[str, str]]]:
+    """Rows of the fleet engine, one block of _FLEET_BLOCK_STEPS timesteps at a time."""
+    import numpy as np
+
+    fleet = cfg["fleet"]
+    spec = _sharded_spec(cfg)
+    total_timesteps = cfg["total_timesteps"]
+    datapoint_names = list(cfg["datapoints"])
+    datapoint_count = len(datapoint_names)
+    series = [(asset_type, asset_id, name) for asset_type, asset_id in cfg["asset_pairs"] for name in datapoint_names]
+    plans = [spec["series_plans"][(asset_id, name)] for _, asset_id, name in series]
+    mn = np.array([cfg["datapoints"][name][0] for _, _, name in series])
+    mx = np.array([cfg["datapoints"][name][1] for _, _, name in series])
+    span = mx - mn
+    mid = (mn + mx) / 2.0
+    np_rng = np.random.default_rng(spec["seed"])
+
+    # Per asset type: output columns, lag per asset, asset factor and innovations the lags reach back into
+    datapoint_factor = _equicorrelation_factor(np, datapoint_count, fleet["datapoint_correlation"])
+    positions: Dict[str, List[int]] = {}
+    for pos, (asset_type, _) in enumerate(cfg["asset_pairs"]):
+        positions.setdefault(asset_type, []).append(pos)
+    types = []
+    for pos in positions.values():
+        n = len(pos)
+        lags = np.rint(np.arange(n) / max(1, n - 1) * fleet["lag_spread"] * cfg["lag_steps"]).astype(int)
+        factor = _equicorrelation_factor(np, n, fleet["asset_correlation"])
+        history = factor @ np_rng.standard_normal((int(lags.max()), n, datapoint_count)) @ datapoint_factor.T
+        columns = (np.array(pos)[:, None] * datapoint_count + np.arange(datapoint_count)[None, :]).ravel()
+        types.append({"columns": columns, "lags": lags, "factor": factor, "history": history})
+
+    phi = math.exp(-cfg["minutes_per_step"] / (fleet["persistence_hours"] * 60.0))
+    innovation_scale = math.sqrt(1.0 - phi * phi)
+    amplitude = fleet["disturbance"] * span
+    noise_scale = span * 0.008
+    trend_limit = span * 0.25
+    setpoint_schedule = spec["setpoint_schedule"]
+    setpoint_speed = cfg["setpoint_change_speed"]
+
+    trend = np.zeros(len(series))
+    velocity = np.zeros(len(series))
+    disturbance = np.zeros(len(series))
+    frozen = np.full(len(series), np.nan)
+    prev = mid.copy()
+    setpoint_target = 0.0
+    setpoint_offset = 0.0
+
+    for lo in range(0, total_timesteps, _FLEET_BLOCK_STEPS):
+        hi = min(lo + _FLEET_BLOCK_STEPS, total_timesteps)
+        steps = hi - lo
+        timestamps = [cfg["start"] + cfg["step"] * ts_idx for ts_idx in range(lo, hi)]
+        daily = 0.2 * np.sin(2.0 * math.pi * np.array([(ts.hour * 60 + ts.minute) / 1440.0 for ts in timestamps]))
+
+        # Correlated innovations of the block, each asset reading them at its own lag
+        innovations = np.empty((steps, len(series)))
+        for group in types:
+            fresh = group["factor"] @ np_rng.standard_normal((steps, len(group["lags"]), datapoint_count)) @ datapoint_factor.T
+            extended = np.concatenate([group["history"], fresh])
+            reach = len(group["history"])
+            rows_idx = reach - group["lags"][None, :] + np.arange(steps)[:, None]
+            lagged = extended[rows_idx, np.arange(len(group["lags"]))[None, :], :]
+            innovations[:, group["columns"]] = lagged.reshape(steps, -1)
+            group["history"] = extended[len(extended) - reach:]
+
+        # Planned components of the block
+        drift = np.zeros((steps, len(series)))
+        nudges = np.zeros((steps, len(series)))
+        modes = np.zeros((steps, len(series)), dtype=np.int8)
+        block_idx = np.arange(lo, hi)
+        for s, plan in enumerate(plans):
+            if plan["drift"] is not None:
+                starts = np.array(plan["drift"]["starts"])
+                seg = np.searchsorted(starts, block_idx, side="right") - 1
+                level = (np.array(plan["drift"]["levels"])[seg] + np.array(plan["drift"]["directions"])[seg]
+                         * plan["drift"]["speed"] * (block_idx - starts[seg] + 1))
+                drift[:, s] = np.clip(level, -cfg["drift_magnitude"], cfg["drift_magnitude"])
+            first = bisect.bisect_left(plan["trend"]["steps"], lo)
+            last = bisect.bisect_left(plan["trend"]["steps"], hi)
+            nudges[np.array(plan["trend"]["steps"][first:last], dtype=int) - lo, s] = plan["trend"]["nudges"][first:last]
+            for start_fail, end_fail, mode in plan["failures"]:
+                if start_fail < hi and end_fail >= lo:
+                    modes[max(start_fail, lo) - lo:min(end_fail, hi - 1) - lo + 1, s] = _FAILURE_CODES[mode]
+        failing = modes.any(axis=1)
+        noise = np_rng.standard_normal((steps, len(series))) * noise_scale
+        erratic = np_rng.uniform(mn - span * 0.5, mx + span * 0.5, size=(steps, len(series)))
+
+        values = np.empty((steps, len(series)))
+        for t in range(steps):
+            ts_idx = lo + t
+            if ts_idx in setpoint_schedule:
+                setpoint_target = setpoint_schedule[ts_idx]
+            offset_diff = setpoint_target - setpoint_offset
+            setpoint_offset = setpoint_offset + offset_diff * setpoint_speed if abs(offset_diff) > 0.001 else setpoint_target
+
+            velocity += span * 0.001 * nudges[t]
+            trend += velocity
+            velocity *= 0.98
+            trend *= 0.999
+            np.minimum(np.maximum(trend, -trend_limit, out=trend), trend_limit, out=trend)
+            disturbance = phi * disturbance + innovation_scale * innovations[t]
+
+            if ts_idx == 0:
+                base = mid
+            else:
+                target = mid + span * (daily[t] + drift[t] + setpoint_offset) + trend + amplitude * disturbance
+                base = prev * 0.85 + target * 0.15
+            value = np.minimum(np.maximum(base + noise[t], mn), mx)
+            if failing[t]:
+                mode = modes[t]
+                is_frozen = mode == _FAILURE_CODES["frozen"]
+                frozen = np.where(is_frozen, np.where(np.isnan(frozen), prev, frozen), np.nan)
+                value = np.where(mode == _FAILURE_CODES["zero"], 0.0,
+                                 np.where(is_frozen, frozen,
+                                          np.where(mode == _FAILURE_CODES["erratic"], erratic[t], value)))
+            else:
+                frozen.fill(np.nan)
+            values[t] = value
+            prev = value
+
+        ts_strings = [ts.strftime("%Y-%m-%d %H:%M:%S") for ts in timestamps]
+        rows: List[Dict[str, str]] = []
+        for s, (asset_type, asset_id, datapoint_name) in enumerate(series):
+            for ts, value in zip(ts_strings, values[:, s].tolist()):
+                rows.append({
+                    "customer": cfg["customer"],
+                    "site": cfg["site"],
+                    "asset_type": asset_type,
+                    "asset_id": asset_id,
+                    "ts": ts,
+                    "datapoint": datapoint_name,
+                    "value": f"{value:.3f}",
+                })
+        post_rng = random.Random(f"{spec['seed']}:fleet{lo}:post")
+        rows = _apply_gaps(rows, spec["gaps"], post_rng)
+        _apply_anomalies(rows, spec["anomalies"], spec["anomaly_severity"], spec["sensor_failures"],
+                         spec["datapoints"], post_rng)
+        yield rows
+
+
+def _generate_fleet(cfg: Mapping) -> List[Dict[str, str]]:
+    rows: List[Dict[str, str]] = []
+    for block in _iter_fleet_blocks(cfg):
+        rows.extend(block)
+    return rows
+
+
+def _run_legacy_series(cfg: Mapping, rng: random.Random, state: Dict, first_idx: int, last_idx: int,
+                       mn: float, mx: float, setpoint_schedule: Mapping[int, float],
+                       sensor_failure_periods: List[Tuple[int, int, str]], values: List[float],
+                       source: Optional[List[float]], source_offset: int,
+                       snapshot_interval: int = 0, snapshots: Optional[Dict[int, Tuple]] = None) -> List[float]:
+    """Advance one legacy series over [first_idx, last_idx], appending its values to ``values``.
+
+    ``state`` (trend_state, prev_value, current_setpoint_offset, frozen_value) is updated in place,
+    so a series can be resumed from a snapshot. ``source`` holds the correlation source values from
+    timestep ``source_offset`` on; the first asset of a type is its own source (``source is values``).
+    Every ``snapshot_interval`` timesteps the state before that step is recorded in ``snapshots``.
+    """
+    start = cfg["start"]
+    step = cfg["step"]
+    lag_steps = cfg["lag_steps"]
+    drift_enabled = cfg["drift_enabled"]
+    drift_magnitude = cfg["drift_magnitude"]
+    drift_period_hours = cfg["drift_period_hours"]
+    setpoint_change_speed = cfg["setpoint_change_speed"]
+    trend_state = state["trend_state"]
+    prev_value = state["prev_value"]
+    current_setpoint_offset = state["current_setpoint_offset"]
+    frozen_value = state["frozen_value"]
+
+    ts = start + step * first_idx
+    for ts_idx in range(first_idx, last_idx + 1):
+        if snapshot_interval and ts_idx % snapshot_interval == 0:
+            # The first asset of a type also needs its last lag_steps values to resume self-correlation
+            source_tail = values[max(0, len(values) - lag_steps):] if source is values else None
+            snapshots[ts_idx] = (rng.getstate(), dict(trend_state), prev_value, current_setpoint_offset,
+                                 frozen_value, source_tail)
+
+        # Check if there's a setpoint change at this timestep
+        if ts_idx in setpoint_schedule:
+            current_setpoint_offset = setpoint_schedule[ts_idx]
+        
+        # Check if we're in a sensor failure period
+        in_failure = False
+        failure_mode = None
+        for start_fail, end_fail, mode in sensor_failure_periods:
+            if start_fail <= ts_idx <= end_fail:
+                in_failure = True
+                failure_mode = mode
+                break
+        
+        if in_failure:
+            # Apply sensor failure behavior
+            if failure_mode == "zero":
+                value = 0.0
+            elif failure_mode == "frozen":
+                if frozen_value is None:
+                    # Freeze at current value
+                    frozen_value = prev_value if prev_value is not None else (mn + mx) / 2
+                value = frozen_value
+            elif failure_mode == "erratic":
+                # Wild fluctuations across entire possible range
+                span = mx - mn
+                value = rng.uniform(mn - span * 0.5, mx + span * 0.5)
+            else:
+                value = _generate_value(ts, mn, mx, rng, prev_value, trend_state, start,
+                                       drift_enabled, drift_magnitude, drift_period_hours,
+                                       current_setpoint_offset, setpoint_change_speed)
+        else:
+            # Normal operation
+            frozen_value = None  # Reset frozen value when failure ends
+            value = _generate_value(ts, mn, mx, rng, prev_value, trend_state, start,
+                                   drift_enabled, drift_magnitude, drift_period_hours,
+                                   current_setpoint_offset, setpoint_change_speed)
+            
+            # Apply correlation from first asset of same type (not first datapoint)
+            if source is not None:
+                # Look back by lag_steps
+                source_idx = ts_idx - lag_steps - source_offset
+                if 0 <= source_idx < len(source):
+                    # Get normalized position of source value in its range
+                    source_val = source[source_idx]
+                    source_normalized = (source_val - mn) / (mx - mn) if mx > mn else 0.5
+                    
+                    # Apply correlation: blend current value with correlated target
+                    target_val = mn + (mx - mn) * source_normalized
+                    value = value * 0.7 + target_val * 0.3  # 30% correlation strength
+        
+        values.append(value)
+        prev_value = value
+        ts = ts + step
+
+    state["prev_value"] = prev_value
+    state["current_setpoint_offset"] = current_setpoint_offset
+    state["frozen_value"] = frozen_value
+    return values
+
+
+def _generate_legacy(cfg: Mapping, snapshot_interval: int = 0) -> Tuple[List[Dict[str, str]], Optional[Dict]]:
+    """Run the legacy engine; with ``snapshot_interval`` also return the snapshot index for slicing."""
+    rng = random.Random(cfg["seed"])
+    total_timesteps = cfg["total_timesteps"]
+    datapoints = cfg["datapoints"]
+
+    rows: List[Dict[str, str]] = []
+    timestamps = [ts.strftime("%Y-%m-%d %H:%M:%S") for ts in _iter_datetimes(cfg["start"], cfg["end"], cfg["step"])]
+    
+    # Calculate setpoint change schedule
+    setpoint_schedule = _plan_setpoints(rng, cfg["setpoint_changes"], total_timesteps,
+                                        cfg["setpoint_change_magnitude"])
+    
+    # Store time series per asset_type and datapoint for correlation.
+    # The first asset of a type stores its values and correlates with its own lagged values,
+    # later assets of the same type correlate with that first asset.
+    # Key: (asset_type, datapoint_name) -> index into `series`
+    asset_type_correlation: Dict[Tuple[str, str], int] = {}
+    series: List[Dict] = []
+    series_values: List[List[float]] = []
+    
+    # Generate data per asset, with correlation between same asset types
+    for asset_type, asset_id in cfg["asset_pairs"]:
+        for datapoint_name, (mn, mx) in datapoints.items():
+            # Generate unique sensor failure schedule for this asset+datapoint combination
+            sensor_failure_periods = _plan_sensor_failures(rng, cfg["sensor_failures"], total_timesteps,
+                                                           cfg["duration_steps"], cfg["sensor_failure_type"])
+            correlation_key = (asset_type, datapoint_name)
+            values: List[float] = []
+            if correlation_key in asset_type_correlation:
+                source_series = asset_type_correlation[correlation_key]
+                source = series_values[source_series]
+            else:
+                source_series = None
+                source = values
+                asset_type_correlation[correlation_key] = len(series)
+
+            state = {"trend_state": {}, "prev_value": None, "current_setpoint_offset": 0.0, "frozen_value": None}
+            snapshots: Dict[int, Tuple] = {}
+            _run_legacy_series(cfg, rng, state, 0, total_timesteps - 1, mn, mx, setpoint_schedule,
+                               sensor_failure_periods, values, source, 0, snapshot_interval, snapshots)
+
+            series.append({
+                "asset_type": asset_type,
+                "asset_id": asset_id,
+                "datapoint": datapoint_name,
+                "failures": sensor_failure_periods,
+                "source_series": source_series,
+                "snapshots": snapshots,
+            })
+            series_values.append(values)
+            for ts_idx, value in enumerate(values):
+                rows.append({
+                    "customer": cfg["customer"],
+                    "site": cfg["site"],
+                    "asset_type": asset_type,
+                    "asset_id": asset_id,
+                    "ts": timestamps[ts_idx],
+                    "datapoint": datapoint_name,
+                    "value": f"{value:.3f}",
+                })
+
+    if not snapshot_interval:
+        rows = _apply_gaps(rows, cfg["gaps"], rng)
+        _apply_anomalies(rows, cfg["anomalies"], cfg["anomaly_severity"], cfg["sensor_failures"], datapoints, rng)
+        return rows, None
+
+    # Gaps and anomalies are drawn over all rows at once, so the index records their outcome
+    # per pre-gap row position (series_idx * total_timesteps + ts_idx) instead of replaying them
+    all_rows = rows
+    raw_values = [row["value"] for row in all_rows]
+    rows = _apply_gaps(rows, cfg["gaps"], rng)
+    _apply_anomalies(rows, cfg["anomalies"], cfg["anomaly_severity"], cfg["sensor_failures"], datapoints, rng)
+    kept = {id(row) for row in rows}
+    index = {
+        "snapshot_interval": snapshot_interval,
+        "total_timesteps": total_timesteps,
+        "setpoint_schedule": setpoint_schedule,
+        "series": series,
+        "dropped": {pos for pos, row in enumerate(all_rows) if id(row) not in kept},
+        "anomalies": {pos: row["value"] for pos, row in enumerate(all_rows)
+                      if id(row) in kept and row["value"] != raw_values[pos]},
+    }
+    return rows, index
+
+
+def _params_digest(params: Mapping) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def build_snapshot_index(params: Mapping,
+                         snapshot_interval: int,
+                         default_datapoints: Mapping[str, Sequence[float]] = {},
+                         require_asset_types: bool = False) -> Dict:
+    """Run the legacy engine once and record full series state every ``snapshot_interval`` timesteps.
+
+    The index lets ``generate_slice`` reproduce any asset/datapoint/time window of that run
+    without regenerating from ``start``. It is plain data and can be pickled to disk.
+    """
+    cfg = _resolve_config(params, default_datapoints, require_asset_types)
+    if cfg["engine"] != "legacy":
+        raise ValueError("snapshot indexes are only supported for engine: legacy")
+    if snapshot_interval < 1:
+        raise ValueError("snapshot_interval must be >= 1")
+    _, index = _generate_legacy(cfg, snapshot_interval)
+    index["params_sha256"] = _params_digest(params)
+    return index
+
+
+def generate_slice(params: Mapping,
+                   index: Mapping,
+                   asset_ids: Optional[Sequence[str]] = None,
+                   datapoints: Optional[Sequence[str]] = None,
+                   window_start: Optional[str] = None,
+                   window_end: Optional[str] = None,
+                   default_datapoints: Mapping[str, Sequence[float]] = {},
+                   require_asset_types: bool = False) -> List[Dict[str, str]]:
+    """Reproduce the legacy rows for the given assets, datapoints and inclusive time window.
+
+    Rows are identical to the full run's (including gaps and anomalies). Each series is replayed
+    from the nearest snapshot at or before ``window_start``, so the cost is the window plus at
+    most one snapshot interval (and the same again for its correlation source, if any).
+    """
+    if index.get("params_sha256") != _params_digest(params):
+        raise ValueError("snapshot index was built for different interview_params; rebuild it")
+    cfg = _resolve_config(params, default_datapoints, require_asset_types)
+    interval = index["snapshot_interval"]
+    total_timesteps = index["total_timesteps"]
+    step_seconds = cfg["step"].total_seconds()
+
+    first_idx = 0
+    last_idx = total_timesteps - 1
+    if window_start is not None:
+        first_idx = max(first_idx, math.ceil((_parse_iso_datetime(window_start) - cfg["start"]).total_seconds() / step_seconds))
+    if window_end is not None:
+        last_idx = min(last_idx, math.floor((_parse_iso_datetime(window_end) - cfg["start"]).total_seconds() / step_seconds))
+
+    def replay(series_idx: int, lo: int, hi: int) -> Tuple[int, List[float]]:
+        # Returns (offset, values) covering at least [lo, hi]
+        entry = index["series"][series_idx]
+        snap_idx = (lo // interval) * interval
+        rng_state, trend_state, prev_value, current_setpoint_offset, frozen_value, source_tail = entry["snapshots"][snap_idx]
+        rng = random.Random()
+        rng.setstate(rng_state)
+        state = {"trend_state": dict(trend_state), "prev_value": prev_value,
+                 "current_setpoint_offset": current_setpoint_offset, "frozen_value": frozen_value}
+        mn, mx = cfg["datapoints"][entry["datapoint"]]
+        if entry["source_series"] is None:
+            # Self-correlating series resume with their own lagged tail in front of the window
+            values = list(source_tail)
+            offset = snap_idx - len(values)
+            source, source_offset = values, offset
+        else:
+            values = []
+            offset = snap_idx
+            source_lo = max(0, snap_idx - cfg["lag_steps"])
+            source_hi = hi - cfg["lag_steps"]
+            source_offset, source = (replay(entry["source_series"], source_lo, source_hi)
+                                     if source_hi >= source_lo else (0, []))
+        _run_legacy_series(cfg, rng, state, snap_idx, hi, mn, mx, index["setpoint_schedule"], entry["failures"],
+                           values, source, source_offset)
+        return offset, values
+
+    rows: List[Dict[str, str]] = []
+    if first_idx > last_idx:
+        return rows
+    for series_idx, entry in enumerate(index["series"]):
+        if asset_ids is not None and entry["asset_id"] not in asset_ids:
+            continue
+        if datapoints is not None and entry["datapoint"] not in datapoints:
+            continue
+        offset, values = replay(series_idx, first_idx, last_idx)
+        for ts_idx in range(first_idx, last_idx + 1):
+            pos = series_idx * total_timesteps + ts_idx
+            if pos in index["dropped"]:
+                continue
+            rows.append({
+                "customer": cfg["customer"],
+                "site": cfg["site"],
+                "asset_type": entry["asset_type"],
+                "asset_id": entry["asset_id"],
+                "ts": (cfg["start"] + cfg["step"] * ts_idx).strftime("%Y-%m-%d %H:%M:%S"),
+                "datapoint": entry["datapoint"],
+                "value": index["anomalies"].get(pos, f"{values[ts_idx - offset]:.3f}"),
+            })
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Dry-run cost planning
+# ---------------------------------------------------------------------------
+# Runtime and peak Python heap per generated row while the rows and the dataframe matrix are
+# alive, measured with tools/lnd_cost.py calibrate (CPython 3.11). Re-calibrate after changing
+# an engine; the Snowpark sandbox adds its own overhead on top of these.
+_COST_PER_ROW = {
+    "legacy": {"seconds": 14.0e-6, "peak_bytes": 500},
+    "sharded": {"seconds": 17.5e-6, "peak_bytes": 520},
+    "fleet": {"seconds": 10.9e-6, "peak_bytes": 450},
+}
+_LIMIT_KEYS = ("max_rows", "max_memory_mb", "max_output_mb", "max_runtime_minutes")
+_PLAN_COLUMNS = ["chunk", "assets", "window_start", "window_end", "rows", "output_mb", "peak_memory_mb",
+                 "runtime_seconds", "verdict"]
+
+
+def _row_bytes(cfg: Mapping) -> float:
+    """Average size of one output row as delimited text, from the configured keys and value ranges."""
+    asset_chars = sum(len(t) + len(a) for t, a in cfg["asset_pairs"]) / len(cfg["asset_pairs"])
+    datapoint_chars = sum(len(name) + len(f"{max(abs(mn), abs(mx)):.3f}")
+                          for name, (mn, mx) in cfg["datapoints"].items()) / len(cfg["datapoints"])
+    # 19 chars of timestamp, 7 delimiters
+    return len(cfg["customer"]) + len(cfg["site"]) + asset_chars + datapoint_chars + 19 + 7
+
+
+def _estimate_cost(cfg: Mapping, asset_count: int, timesteps: int, warm_steps: int = 0, workers: int = 1) -> Dict[str, float]:
+    """Rows after gaps, output bytes, peak memory and runtime for asset_count assets over timesteps."""
+    total_rows = cfg["total_timesteps"] * len(cfg["asset_pairs"]) * len(cfg["datapoints"])
+    gap_fraction = cfg["gaps"] if cfg["gaps"] < 1 else min(cfg["gaps"] / total_rows, 1.0)
+    cost = _COST_PER_ROW[cfg["engine"]]
+    series = asset_count * len(cfg["datapoints"])
+    rows = series * timesteps
+    kept = int(round(rows * (1.0 - gap_fraction)))
+    return {
+        "rows": kept,
+        "output_bytes": kept * _row_bytes(cfg),
+        "peak_memory_bytes": rows * cost["peak_bytes"],
+        "runtime_seconds": series * (timesteps + warm_steps) * cost["seconds"] / workers,
+    }
+
+
+def _pipeline_in_flight(cfg: Mapping) -> int:
+    """Chunks a pipelined run holds at most: one per producer worker, queued batch and busy uploader."""
+    pipeline = cfg["pipeline"]
+    return _backfill_settings(cfg)[2] + pipeline["queue_batches"] + pipeline["uploaders"]
+
+
+def _plan_chunks(cfg: Mapping) -> Tuple[List[Dict], List[str]]:
+    """Split the run into chunks that fit ``limits`` and return (chunks, limit violations).
+
+    Without a memory problem the whole run is one chunk. With ``on_exceed: shard`` and the
+    sharded engine, a run over ``max_memory_mb`` is split into time shards, and further into
+    asset groups when even one shard of all assets does not fit; chunks are generated and
+    handed to the session one at a time. A sharded run with ``pipeline`` is always split into
+    time shards, and ``max_memory_mb`` then covers all chunks the pipeline holds at once.
+    """
+    limits = cfg["limits"]
+    total_timesteps = cfg["total_timesteps"]
+    asset_pairs = cfg["asset_pairs"]
+    workers = _backfill_settings(cfg)[2] if cfg["engine"] == "sharded" else 1
+    total = _estimate_cost(cfg, len(asset_pairs), total_timesteps, workers=workers)
+
+    problems: List[str] = []
+    if "max_rows" in limits and total["rows"] > limits["max_rows"]:
+        problems.append(f"{total['rows']} rows exceed max_rows {limits['max_rows']:.0f}")
+    if "max_output_mb" in limits and total["output_bytes"] > limits["max_output_mb"] * 1e6:
+        problems.append(f"{total['output_bytes'] / 1e6:.1f} MB output exceeds max_output_mb {limits['max_output_mb']:g}")
+    if "max_runtime_minutes" in limits and total["runtime_seconds"] > limits["max_runtime_minutes"] * 60:
+        problems.append(f"{total['runtime_seconds'] / 60:.1f} min runtime exceeds max_runtime_minutes "
+                        f"{limits['max_runtime_minutes']:g}")
+
+    whole = [dict(total, asset_pairs=asset_pairs, first_idx=0, last_idx=total_timesteps - 1, shard=None)]
+    memory_limit = limits.get("max_memory_mb", math.inf) * 1e6
+    pipelined = cfg["pipeline"] is not None and cfg["engine"] == "sharded"
+    if pipelined:
+        in_flight = _pipeline_in_flight(cfg)
+        memory_problem = f"max_memory_mb {limits.get('max_memory_mb', 0):g} spread over {in_flight} pipelined chunks"
+        if cfg["on_exceed"] != "shard":
+            # Shards of shard_hours as configured; checked against the limit below
+            memory_limit = math.inf
+    else:
+        in_flight = 1
+        if total["peak_memory_bytes"] <= memory_limit:
+            return whole, problems
+        memory_problem = (f"{total['peak_memory_bytes'] / 1e6:.0f} MB peak memory exceeds max_memory_mb "
+                          f"{limits['max_memory_mb']:g}")
+        if cfg["on_exceed"] != "shard":
+            return whole, problems + [memory_problem]
+        if cfg["engine"] != "sharded":
+            reason = ("legacy output is fixed per seed and cannot be split" if cfg["engine"] == "legacy"
+                      else "fleet carries its state through the whole timeline")
+            return whole, problems + [memory_problem + f"; automatic sharding needs engine: sharded ({reason})"]
+
+    shard_steps, burn_in_steps, _ = _backfill_settings(cfg)
+    budget_rows = memory_limit / in_flight / _COST_PER_ROW["sharded"]["peak_bytes"]
+    datapoint_count = len(cfg["datapoints"])
+    type_count = len({asset_type for asset_type, _ in asset_pairs})
+    # Longest time shard (up to shard_hours) that fits all assets, else shorter shards and asset groups
+    steps = min(total_timesteps, shard_steps)
+    group_size = len(asset_pairs)
+    if len(asset_pairs) * datapoint_count * (steps + burn_in_steps) > budget_rows:
+        steps = min(steps, max(1, int(budget_rows / (len(asset_pairs) * datapoint_count)) - burn_in_steps))
+    if len(asset_pairs) * datapoint_count * (steps + burn_in_steps) > budget_rows:
+        steps = min(total_timesteps, shard_steps)
+        while True:
+            # Each group also generates (and drops) the first asset of every type it contains
+            group_size = int(budget_rows / (datapoint_count * (steps + burn_in_steps))) - type_count
+            if group_size >= 1 or steps == 1:
+                break
+            steps = max(1, steps // 2)
+        if group_size < 1:
+            return whole, problems + [memory_problem + "; max_memory_mb is too small for even one asset per shard"]
+
+    chunks: List[Dict] = []
+    for lo in range(0, len(asset_pairs), group_size):
+        group = asset_pairs[lo:lo + group_size]
+        for shard in _plan_backfill_shards(total_timesteps, steps, burn_in_steps):
+            first_idx, last_idx, warm_idx = shard
+            chunks.append(dict(_estimate_cost(cfg, len(group), last_idx - first_idx + 1, first_idx - warm_idx),
+                               asset_pairs=group, first_idx=first_idx, last_idx=last_idx, shard=shard))
+    if pipelined:
+        peak = max(chunk["peak_memory_bytes"] for chunk in chunks) * min(in_flight, len(chunks))
+        if peak > limits.get("max_memory_mb", math.inf) * 1e6:
+            problems.append(f"{peak / 1e6:.0f} MB peak memory of {min(in_flight, len(chunks))} pipelined chunks "
+                            f"exceeds max_memory_mb {limits['max_memory_mb']:g}")
+    return chunks, problems
+
+
+def _plan_to_dataframe(session, cfg: Mapping, chunks: List[Dict], problems: List[str]):
+    verdict = "rejected: " + "; ".join(problems) if problems else "ok"
+    data = []
+    for i, chunk in enumerate(chunks):
+        data.append([
+            i,
+            len(chunk["asset_pairs"]),
+            (cfg["start"] + cfg["step"] * chunk["first_idx"]).strftime("%Y-%m-%d %H:%M:%S"),
+            (cfg["start"] + cfg["step"] * chunk["last_idx"]).strftime("%Y-%m-%d %H:%M:%S"),
+            chunk["rows"],
+            round(chunk["output_bytes"] / 1e6, 3),
+            round(chunk["peak_memory_bytes"] / 1e6, 3),
+            round(chunk["runtime_seconds"], 3),
+            verdict,
+        ])
+    return session.create_dataframe(data, schema=_PLAN_COLUMNS)
+
+
+# ---------------------------------------------------------------------------
+# Pipelined upload
+#
+# With ``pipeline`` set, generation and upload overlap: the producer (this thread,
+# plus backfill worker processes for engine: sharded) turns chunks into output
+# batches of at most batch_rows rows and puts them on a bounded queue; a pool of
+# uploader threads hands them to session.create_dataframe, retrying failures with
+# exponential backoff. A full queue blocks the producer, so at most
+# _pipeline_in_flight chunks are alive at once. Generation is CPU-bound and the
+# uploads wait on the network, so threads overlap the two under the GIL; the
+# Snowpark session is shared by the uploaders (thread-safe since Snowpark 1.24).
+# ---------------------------------------------------------------------------
+
+_logger = logging.getLogger(__name__)
+
+
+def _produce_batches(cfg: Mapping, chunks: List[Dict], column_aliases: Mapping[str, str]) -> Iterator[Tuple[List[str], List[List[str]]]]:
+    """(columns, data matrix) batches of at most batch_rows rows, chunk by chunk."""
+    batch_rows = cfg["pipeline"]["batch_rows"]
+    if cfg["engine"] == "sharded":
+        chunk_rows = _iter_chunk_rows(_sharded_spec(cfg), chunks, _backfill_settings(cfg)[2])
+    elif cfg["engine"] == "fleet":
+        chunk_rows = _iter_fleet_blocks(cfg)
+    else:
+        # legacy draws every series from one RNG in a fixed order: generated in one go, only the upload is batched
+        chunk_rows = iter([_generate_legacy(cfg)[0]])
+    for rows in chunk_rows:
+        for lo in range(0, len(rows), batch_rows):
+            yield _rows_to_matrix(rows[lo:lo + batch_rows], column_aliases)
+
+
+def _iter_chunk_rows(spec: Mapping, chunks: List[Dict], workers: int) -> Iterator[List[Dict[str, str]]]:
+    """Rows of each chunk in order; with workers > 1 at most that many chunks are generated ahead."""
+    if workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            yield _generate_chunk(spec, chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_generate_chunk, spec, chunk))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _run_pipeline(session, batches: Iterator[Tuple[List[str], List[List[str]]]], pipeline: Mapping) -> Tuple[List, Dict]:
+    """Upload batches from a bounded queue with a pool of uploader threads; return (frames in order, metrics)."""
+    work: queue.Queue = queue.Queue(maxsize=pipeline["queue_batches"])
+    frames: Dict[int, object] = {}
+    errors: List[BaseException] = []
+    failed = threading.Event()
+    lock = threading.Lock()
+    metrics = {
+        "batches": 0,
+        "rows": 0,
+        "uploaders": pipeline["uploaders"],
+        "queue_batches": pipeline["queue_batches"],
+        "wall_seconds": 0.0,
+        "rows_per_second": 0.0,
+        "produce_seconds": 0.0,
+        "upload_seconds": 0.0,
+        # Producer blocked on a full queue: uploads are the bottleneck (add uploaders)
+        "producer_wait_seconds": 0.0,
+        # Uploaders idle on an empty queue before a batch arrives: generation is the bottleneck (add
+        # backfill workers). The final wait that ends with the end sentinel is not counted.
+        "uploader_wait_seconds": 0.0,
+        "max_queue_depth": 0,
+        "retries": 0,
+    }
+
+    def upload() -> None:
+        while True:
+            waited = time.perf_counter()
+            item = work.get()
+            if item is None:
+                return  # idle until the end sentinel: the run is over, not starved
+            idle = time.perf_counter() - waited
+            seq, (columns, data) = item
+            if failed.is_set():
+                continue  # drain so the producer never blocks on a dead pipeline
+            began = time.perf_counter()
+            for attempt in range(pipeline["retries"] + 1):
+                try:
+                    frame = session.create_dataframe(data, schema=columns)
+                    break
+                except Exception as exc:
+                    if attempt == pipeline["retries"]:
+                        errors.append(exc)
+                        failed.set()
+                        frame = None
+                        break
+                    with lock:
+                        metrics["retries"] += 1
+                    time.sleep(pipeline["retry_backoff_seconds"] * 2 ** attempt)
+            with lock:
+                frames[seq] = frame
+                metrics["upload_seconds"] += time.perf_counter() - began
+                metrics["uploader_wait_seconds"] += idle
+
+    uploaders = [threading.Thread(target=upload, name=f"lnd-uploader-{i}", daemon=True)
+                 for i in range(pipeline["uploaders"])]
+    for thread in uploaders:
+        thread.start()
+    started = time.perf_counter()
+    try:
+        seq = 0
+        while not failed.is_set():
+            began = time.perf_counter()
+            batch = next(batches, None)
+            metrics["produce_seconds"] += time.perf_counter() - began
+            if batch is None:
+                break
+            began = time.perf_counter()
+            work.put((seq, batch))
+            metrics["producer_wait_seconds"] += time.perf_counter() - began
+            metrics["max_queue_depth"] = max(metrics["max_queue_depth"], work.qsize())
+            metrics["batches"] += 1
+            metrics["rows"] += len(batch[1])
+            seq += 1
+    finally:
+        for _ in uploaders:
+            work.put(None)
+        for thread in uploaders:
+            thread.join()
+    if errors:
+        raise errors[0]
+
+    metrics["wall_seconds"] = time.perf_counter() - started
+    metrics["rows_per_second"] = metrics["rows"] / metrics["wall_seconds"] if metrics["wall_seconds"] else 0.0
+    return [frames[i] for i in range(len(frames))], metrics
+
+
+def build_dataframe(session,
+                    params: Mapping,
+                    column_aliases: Mapping[str, str],
+                    default_datapoints: Mapping[str, Sequence[float]],
+                    require_asset_types: bool = False,
+                    metrics: Optional[Dict] = None):
+    """Generate the landing rows for ``params``; with ``dry_run: true`` return the cost plan instead.
+
+    With ``pipeline`` set, the pipeline metrics are logged and, if given, written into ``metrics``.
+    """
+    cfg = _resolve_config(params, default_datapoints, require_asset_types)
+    chunks, problems = _plan_chunks(cfg)
+    if cfg["dry_run"]:
+        return _plan_to_dataframe(session, cfg, chunks, problems)
+    if problems:
+        raise ValueError("interview_params exceed limits: " + "; ".join(problems))
+
+    if cfg["pipeline"] is not None:
+        frames, pipeline_metrics = _run_pipeline(session, _produce_batches(cfg, chunks, column_aliases), cfg["pipeline"])
+        _logger.info("landing pipeline: %s", json.dumps(pipeline_metrics, sort_keys=True))
+        if metrics is not None:
+            metrics.update(pipeline_metrics)
+        if not frames:
+            return _rows_to_dataframe(session, [], column_aliases)
+        return reduce(lambda left, right: left.union_all(right), frames)
+    if len(chunks) > 1:
+        # Over max_memory_mb: one chunk in memory at a time, unioned by the session
+        spec = _sharded_spec(cfg)
+        frames = [_rows_to_dataframe(session, _generate_chunk(spec, chunk), column_aliases) for chunk in chunks]
+        return reduce(lambda left, right: left.union_all(right), frames)
+    if cfg["engine"] == "sharded":
+        rows = _generate_sharded(cfg)
+    elif cfg["engine"] == "fleet":
+        rows = _generate_fleet(cfg)
+    else:
+        rows, _ = _generate_legacy(cfg)
+    return _rows_to_dataframe(session, rows, column_aliases)
+
+
 def model(dbt, session):
-    dbt.config(materialized="table")
+    dbt.config(materialized="table", packages=["numpy"])
     meta = dbt.config.get("meta") or {}
     params = meta.get("interview_params", {})
 
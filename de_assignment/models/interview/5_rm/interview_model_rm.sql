@@ -1,4 +1,17 @@
+{%- set rm_build_mode = var('rm_build_mode', 'row') -%}
+{%- if rm_build_mode not in ['row', 'batched'] -%}
+  {{ exceptions.raise_compiler_error("rm_build_mode must be 'row' or 'batched', got: " ~ rm_build_mode) }}
+{%- endif -%}
+{%- if rm_build_mode == 'batched' -%}
+{{ config(
+    tags=['interview'],
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key=['customer_short_code', 'dc_site_code', 'asset_id', 'event_dt', 'datapoint']
+) }}
+{%- else -%}
 {{ config(tags=['interview']) }}
+{%- endif %}
 
 -- TODO: Flatten DM facts and dims and add a new column with a JSON payload.
 -- Input: fact {{ ref('interview_model_fact_measurement') }}, dims {{ ref('interview_model_dm_dim_asset') }}, {{ ref('interview_model_dm_dim_date') }}.
@@ -11,4 +24,16 @@
 -- 4) Add tests in interview_model_rm.yml for not_null on keys and json_payload.
 -- 5) What do you choose as a materialisation and why?
 -- 6) Would it make sense to add dbt contract to this model and why?
+
+-- Batched build mode (--vars '{rm_build_mode: batched}'): block-level dim join, precomputed payload key
+-- layout and incremental rebuild of changed rows only, see macros/rm_batched_payloads.yml
+{% if rm_build_mode == 'batched' -%}
+{{ rm_batched_payloads(
+    fact=ref('interview_model_fact_measurement'),
+    dim_asset=ref('interview_model_dm_dim_asset'),
+    dim_date=ref('interview_model_dm_dim_date'),
+    lookback_days=var('rm_lookback_days', 2)
+) }}
+{%- else -%}
 select 1
+{%- endif %}
@@ -0,0 +1,23 @@
+{{ config(
+    tags=['interview', 'dq'],
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key=['model_name', 'check_name', 'partition_date']
+) }}
+
+-- Per-partition results of the interview_model_ehs_in_SITE1 grain checks, read by the dq_partitions_* generic tests.
+-- Each run profiles only partitions from dq_lookback_hours before the latest evaluated event_dts on, and
+-- re-evaluates those that changed plus the dq_lookback_hours after them, see macros/dq_partition_tests.yml
+-- depends_on: {{ ref('interview_model_ehs_in_SITE1') }}
+
+{{ dq_partition_results(
+    models=[{
+      'model': 'interview_model_ehs_in_SITE1',
+      'partition_column': 'event_dts',
+      'changed_column': 'event_dts',
+      'grain': ['customer_short_code', 'dc_site_code', 'asset_id', 'event_dts', 'datapoint'],
+      'series': ['customer_short_code', 'dc_site_code', 'asset_id', 'datapoint']
+    }],
+    lookback_hours=var('dq_lookback_hours', 48),
+    max_gap_hours=var('dq_max_gap_hours', 48)
+) }}
@@ -0,0 +1,25 @@
+{{ config(
+    tags=['interview', 'dq'],
+    materialized='incremental',
+    incremental_strategy='merge',
+    unique_key=['model_name', 'check_name', 'partition_date']
+) }}
+
+-- Per-partition results of the interview_model_ehs_in_SITE2 grain checks, read by the dq_partitions_* generic tests.
+-- Each run profiles only partitions from dq_lookback_hours before the latest evaluated ts on, and
+-- re-evaluates those that changed plus the dq_lookback_hours after them, see macros/dq_partition_tests.yml
+-- depends_on: {{ ref('interview_model_ehs_in_SITE2') }}
+-- EHS_IN SITE2 still passes RHS SITE2 through (select *), so it is checked on the feed's column names; switch
+-- to the standard columns together with the EHS_IN mapping
+
+{{ dq_partition_results(
+    models=[{
+      'model': 'interview_model_ehs_in_SITE2',
+      'partition_column': 'ts',
+      'changed_column': 'ts',
+      'grain': ['tenant_code', 'site_code', 'device_id', 'ts', 'datapoint'],
+      'series': ['tenant_code', 'site_code', 'device_id', 'datapoint']
+    }],
+    lookback_hours=var('dq_lookback_hours', 48),
+    max_gap_hours=var('dq_max_gap_hours', 48)
+) }}
@@ -0,0 +1,40 @@
+{#- Generic tests over the per-partition results of a model, `results` being its dq_partition_results model
+    (macros/dq_partition_tests.yml). They read only the stored summaries, so their cost does not grow with
+    the tested table. -#}
+
+{% test dq_partitions_clean(model, results, check, model_name=none) %}
+{#- Whole-table verdict of one check: every evaluated partition of the model passed -#}
+{%- set model_name = model_name or model.identifier %}
+select
+  partition_date,
+  partition_rows,
+  failures,
+  evaluated_at
+from {{ results }}
+where lower(model_name) = lower('{{ model_name }}')
+  and check_name = '{{ check }}'
+  and status = 'fail'
+{% endtest %}
+
+
+{% test dq_partitions_current(model, results, partition_column, model_name=none) %}
+{#- The results cover the model's latest partition; fails when `results` has not been built since -#}
+{%- set model_name = model_name or model.identifier %}
+with latest as (
+  select cast(max({{ partition_column }}) as date) as partition_date
+  from {{ model }}
+),
+
+evaluated as (
+  select max(partition_date) as partition_date
+  from {{ results }}
+  where lower(model_name) = lower('{{ model_name }}')
+)
+
+select
+  latest.partition_date as latest_partition,
+  evaluated.partition_date as latest_evaluated_partition
+from latest
+cross join evaluated
+where latest.partition_date > coalesce(evaluated.partition_date, cast('1900-01-01' as date))
+{% endtest %}
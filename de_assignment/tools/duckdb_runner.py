@@ -0,0 +1,420 @@
+"""Run the RHS -> EHS -> INT interview models locally on an embedded DuckDB database.
+
+The landing tables are filled from the SITE1/SITE2 generators (``lnd_local.run_model``), the seeds
+from ``seeds/``, and each selected model is compiled from its ``.sql`` file with a small dbt
+stand-in (ref, config, var, is_incremental, this and the project macros) and a Snowflake
+compatibility shim. The run does one full refresh over all but the last ``--increments`` batches of
+landing data, then appends one batch of ``--batch-hours`` at a time and runs an incremental refresh
+after each, reporting per model the wall time, rows scanned (DuckDB profiler) and rows written.
+
+    python tools/duckdb_runner.py
+    python tools/duckdb_runner.py --set end=2025-03-31 --set granularity=minute --assets-per-type 10
+    python tools/duckdb_runner.py --models interview_model_rhs_SITE1 --vars '{lookback_hours: 48}'
+
+Only SQL models are compiled; the landing Python models are run through their generators.
+Snowflake features outside the shim (e.g. OBJECT_CONSTRUCT, LATERAL FLATTEN) fail per model; the
+error is reported and the model's downstream models are skipped in every run.
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import duckdb
+import jinja2
+import yaml
+
+from lnd_local import PROJECT_DIR, SITES, load_params, run_model
+
+MODELS_DIR = PROJECT_DIR / "models"
+MACROS_DIR = PROJECT_DIR / "macros"
+SEEDS_DIR = PROJECT_DIR / "seeds"
+DEFAULT_MODELS = (
+    "interview_model_rhs_SITE1",
+    "interview_model_rhs_SITE2",
+    "interview_model_ehs_in_SITE1",
+    "interview_model_ehs_in_SITE2",
+    "interview_model_ehs_out",
+    "interview_ev_dcasset_chlr_base",
+    "interview_ev_dcasset_crah_base",
+)
+LND_MODELS = {f"generate_lnd_interview_data_{site}": site for site in SITES}
+
+_REF = re.compile(r"""ref\(\s*['"](\w+)['"]\s*\)""")
+
+# ---------------------------------------------------------------------------
+# Snowflake compatibility shim
+# ---------------------------------------------------------------------------
+
+# Snowflake type names in casts (``as <type>`` / ``::<type>``) and their DuckDB equivalents.
+# Snowflake FLOAT is double precision, DuckDB FLOAT is single precision.
+_CAST_TYPES = [
+    (r"number\s*\(\s*(\d+)\s*,\s*(\d+)\s*\)", r"decimal(\1,\2)"),
+    (r"number\s*\(\s*(\d+)\s*\)", r"decimal(\1,0)"),
+    (r"number|numeric|int", "decimal(38,0)"),
+    (r"float4|float8|float|real|double precision", "double"),
+    (r"timestamp_ntz", "timestamp"),
+    (r"timestamp_tz|timestamp_ltz", "timestamptz"),
+    (r"string|text", "varchar"),
+    (r"variant|object", "json"),
+]
+_CAST_TYPE = re.compile(r"(\bas\s+|::\s*)(" + "|".join(f"(?:{p})" for p, _ in _CAST_TYPES) + r")(?!\w)", re.IGNORECASE)
+
+# Snowflake accepts unquoted date parts (date_trunc(hour, ts)); DuckDB needs them as strings
+_DATE_PART_FUNCS = re.compile(r"\b(date_trunc|dateadd|datediff|date_part)\s*\(\s*([A-Za-z_]+)\s*,", re.IGNORECASE)
+_DATE_PARTS = {"year", "quarter", "month", "week", "day", "hour", "minute", "second", "millisecond"}
+
+_SHIM_MACROS = (
+    "CREATE OR REPLACE MACRO iff(c, a, b) AS CASE WHEN c THEN a ELSE b END",
+    "CREATE OR REPLACE MACRO nvl(a, b) AS coalesce(a, b)",
+    "CREATE OR REPLACE MACRO zeroifnull(a) AS coalesce(a, 0)",
+    "CREATE OR REPLACE MACRO div0(a, b) AS CASE WHEN b = 0 THEN 0 ELSE a / b END",
+    """CREATE OR REPLACE MACRO dateadd(part, n, ts) AS ts + CASE lower(part)
+        WHEN 'year' THEN to_years(CAST(n AS INTEGER)) WHEN 'month' THEN to_months(CAST(n AS INTEGER))
+        WHEN 'week' THEN to_weeks(CAST(n AS INTEGER)) WHEN 'day' THEN to_days(CAST(n AS INTEGER))
+        WHEN 'hour' THEN to_hours(CAST(n AS BIGINT)) WHEN 'minute' THEN to_minutes(CAST(n AS BIGINT))
+        WHEN 'second' THEN to_seconds(CAST(n AS DOUBLE)) END""",
+)
+
+
+def _cast_type(match: re.Match) -> str:
+    prefix, type_name = match.group(1), match.group(2)
+    for pattern, replacement in _CAST_TYPES:
+        if re.fullmatch(pattern, type_name, re.IGNORECASE):
+            return prefix + re.sub(pattern, replacement, type_name, flags=re.IGNORECASE)
+    return match.group(0)
+
+
+def _date_part(match: re.Match) -> str:
+    func, part = match.group(1), match.group(2)
+    return f"{func}('{part.lower()}'," if part.lower() in _DATE_PARTS else match.group(0)
+
+
+def to_duckdb(sql: str) -> str:
+    """Rewrite compiled Snowflake SQL into DuckDB SQL (try_cast/cast types, date parts)."""
+    return _DATE_PART_FUNCS.sub(_date_part, _CAST_TYPE.sub(_cast_type, sql))
+
+
+# ---------------------------------------------------------------------------
+# dbt stand-in
+# ---------------------------------------------------------------------------
+
+def discover_models() -> Dict[str, Path]:
+    return {path.stem: path for path in sorted(MODELS_DIR.rglob("*.sql"))}
+
+
+def _project_materialization(path: Path) -> str:
+    """``+materialized`` from dbt_project.yml for the model's folder (deepest setting wins)."""
+    with open(PROJECT_DIR / "dbt_project.yml") as f:
+        project = yaml.safe_load(f)
+    node = project.get("models", {}).get(project["name"], {})
+    materialized = node.get("+materialized", "view")
+    for folder in path.relative_to(MODELS_DIR).parts[:-1]:
+        node = node.get(folder) or {}
+        materialized = node.get("+materialized", materialized)
+    return materialized
+
+
+class _Relation:
+    """``{{ this }}``: renders as the relation of the model being compiled."""
+
+    def __init__(self, compiler: "Compiler"):
+        self._compiler = compiler
+
+    def __str__(self) -> str:
+        return self._compiler.current
+
+    __html__ = __str__
+
+
+class _CompilerError(Exception):
+    pass
+
+
+class Compiler:
+    """Renders model SQL with just enough of dbt's Jinja context for the interview models."""
+
+    def __init__(self, variables: Mapping):
+        self.variables = dict(variables)
+        self.current = ""
+        self.config: Dict = {}
+        self.incremental = False
+        self.env = jinja2.Environment(extensions=["jinja2.ext.do"])
+        self.env.globals.update(
+            ref=lambda name: name,
+            config=self._config,
+            var=self._var,
+            is_incremental=lambda: self.incremental,
+            this=_Relation(self),
+            target={"name": "duckdb", "type": "duckdb", "schema": "main"},
+            exceptions={"raise_compiler_error": self._raise},
+            log=lambda *args, **kwargs: "",
+        )
+        # Project macros become globals, so models can call them as in dbt
+        for path in sorted(MACROS_DIR.glob("*.sql")):
+            module = self.env.from_string(path.read_text()).make_module()
+            for name in dir(module):
+                if not name.startswith("_"):
+                    self.env.globals[name] = getattr(module, name)
+
+    def _config(self, **kwargs) -> str:
+        self.config.update(kwargs)
+        return ""
+
+    def _var(self, name: str, default=None):
+        if name not in self.variables and default is None:
+            raise _CompilerError(f"required var '{name}' is not set (pass it with --vars)")
+        return self.variables.get(name, default)
+
+    @staticmethod
+    def _raise(message: str):
+        raise _CompilerError(message)
+
+    def compile(self, name: str, path: Path, relation_exists: bool, full_refresh: bool) -> Tuple[str, Dict]:
+        self.current = name
+        self.config = {"materialized": _project_materialization(path)}
+        template = self.env.from_string(path.read_text())
+        # Config is read on a first pass, is_incremental() then depends on the materialization
+        self.incremental = False
+        template.render()
+        self.incremental = (self.config["materialized"] == "incremental" and relation_exists and not full_refresh)
+        sql = template.render()
+        return to_duckdb(sql), dict(self.config)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+def _upstream_order(selected: Sequence[str], models: Mapping[str, Path]) -> List[str]:
+    """Selected models plus their SQL upstreams, in dependency order."""
+    order: List[str] = []
+    visiting = set()
+
+    def visit(name: str):
+        if name in order or name not in models:
+            return
+        if name in visiting:
+            raise ValueError(f"dependency cycle at {name}")
+        visiting.add(name)
+        for parent in _REF.findall(models[name].read_text()):
+            visit(parent)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in selected:
+        if name not in models:
+            raise ValueError(f"unknown model {name}")
+        visit(name)
+    return order
+
+
+def _timestamp_column(columns: Sequence[str], row: Sequence) -> int:
+    for i, value in enumerate(row):
+        try:
+            datetime.fromisoformat(str(value))
+        except ValueError:
+            continue
+        if ":" in str(value):
+            return i
+    raise ValueError(f"no timestamp column among {list(columns)}")
+
+
+def _scale_assets(params: Dict, assets_per_type: int) -> Dict:
+    """Replace each asset type's list with ``assets_per_type`` ids following the first id's pattern."""
+    scaled = {}
+    for asset_type, ids in params["asset_types"].items():
+        prefix, _, number = str(ids[0]).rpartition("-")
+        width = len(number)
+        base = int(number) if number.isdigit() else 1
+        scaled[asset_type] = [f"{prefix}-{base + i:0{width}d}" for i in range(assets_per_type)]
+    return dict(params, asset_types=scaled)
+
+
+class Runner:
+    def __init__(self, database: str, variables: Mapping):
+        self.con = duckdb.connect(database)
+        for statement in _SHIM_MACROS:
+            self.con.execute(statement)
+        self.compiler = Compiler(variables)
+        self._profile = os.path.join(tempfile.mkdtemp(prefix="duckdb_runner_"), "profile.json")
+
+    def execute(self, sql: str) -> Dict[str, float]:
+        """Run one statement with the profiler on; returns rows scanned and peak buffer memory."""
+        self.con.execute("PRAGMA enable_profiling='json'")
+        self.con.execute(f"PRAGMA profiling_output='{self._profile}'")
+        try:
+            self.con.execute(sql)
+        finally:
+            self.con.execute("PRAGMA disable_profiling")
+        with open(self._profile) as f:
+            profile = json.load(f)
+        if "cumulative_rows_scanned" in profile:
+            scanned = profile["cumulative_rows_scanned"]
+        else:
+            # Older DuckDB: sum what the table scans emitted
+            def walk(node):
+                own = node.get("operator_cardinality", 0) if node.get("operator_type") == "TABLE_SCAN" else 0
+                return own + sum(walk(child) for child in node.get("children", []))
+            scanned = walk(profile)
+        return {"rows_scanned": scanned, "peak_memory": profile.get("system_peak_buffer_memory", 0)}
+
+    def relation_exists(self, name: str) -> bool:
+        return bool(self.con.execute(
+            "select count(*) from information_schema.tables where table_schema = 'main' and lower(table_name) = lower(?)",
+            [name]).fetchone()[0])
+
+    def load_seeds(self) -> None:
+        for path in sorted(SEEDS_DIR.rglob("*.csv")):
+            self.con.execute(f"CREATE OR REPLACE TABLE {path.stem} AS SELECT * FROM read_csv_auto('{path}', header=true)")
+
+    def load_landing(self, name: str, columns: Sequence[str], rows: Sequence[Sequence], replace: bool) -> None:
+        if replace:
+            self.con.execute(f"CREATE OR REPLACE TABLE {name} ({', '.join(f'{c} VARCHAR' for c in columns)})")
+        if rows:
+            # Bulk load through a CSV file; executemany is orders of magnitude slower
+            staging = os.path.join(os.path.dirname(self._profile), f"{name}.csv")
+            with open(staging, "w", newline="") as f:
+                csv.writer(f).writerows(rows)
+            self.con.execute(f"INSERT INTO {name} SELECT * FROM read_csv('{staging}', header=false, all_varchar=true)")
+            os.remove(staging)
+
+    def build(self, name: str, path: Path, full_refresh: bool) -> Dict:
+        sql, config = self.compiler.compile(name, path, self.relation_exists(name), full_refresh)
+        materialized = config["materialized"]
+        incremental = self.compiler.incremental
+        stats = {"rows_scanned": 0, "peak_memory": 0}
+
+        def run(statement: str):
+            result = self.execute(statement)
+            stats["rows_scanned"] += result["rows_scanned"]
+            stats["peak_memory"] = max(stats["peak_memory"], result["peak_memory"])
+
+        began = time.perf_counter()
+        if materialized == "view":
+            run(f"CREATE OR REPLACE VIEW {name} AS {sql}")
+            written = 0
+        elif not incremental:
+            run(f"CREATE OR REPLACE TABLE {name} AS {sql}")
+            written = self.con.execute(f"select count(*) from {name}").fetchone()[0]
+        else:
+            run(f"CREATE OR REPLACE TEMP TABLE {name}__dbt_tmp AS {sql}")
+            written = self.con.execute(f"select count(*) from {name}__dbt_tmp").fetchone()[0]
+            unique_key = config.get("unique_key")
+            strategy = config.get("incremental_strategy", "merge")
+            if unique_key and strategy in ("merge", "delete+insert"):
+                # MERGE shim: matched keys are replaced by the new rows, the rest inserted
+                keys = [unique_key] if isinstance(unique_key, str) else list(unique_key)
+                condition = " and ".join(f"{name}.{key} = {name}__dbt_tmp.{key}" for key in keys)
+                run(f"DELETE FROM {name} USING {name}__dbt_tmp WHERE {condition}")
+            elif strategy not in ("append", "merge", "delete+insert"):
+                raise _CompilerError(f"incremental_strategy '{strategy}' is not supported by the local runner")
+            run(f"INSERT INTO {name} BY NAME SELECT * FROM {name}__dbt_tmp")
+            run(f"DROP TABLE {name}__dbt_tmp")
+            materialized = f"incremental {strategy if unique_key else 'append'}"
+        elapsed = time.perf_counter() - began
+        return {"materialized": materialized,
+                "seconds": elapsed, "rows_written": written, **stats}
+
+
+def run(models: Sequence[str], overrides: Mapping, assets_per_type: Optional[int], increments: int,
+        batch_hours: float, variables: Mapping, database: str = ":memory:") -> List[Dict]:
+    project_models = discover_models()
+    order = _upstream_order(models, project_models)
+    runner = Runner(database, variables)
+    runner.load_seeds()
+
+    # Landing data: everything up to the last `increments` batches goes into the full refresh
+    landing: Dict[str, Tuple[List[str], List[List[str]], int]] = {}
+    cutoffs: List[str] = []
+    for name, site in LND_MODELS.items():
+        params = load_params(site, overrides)
+        if assets_per_type:
+            params = _scale_assets(params, assets_per_type)
+        columns, rows = run_model(site, params)
+        ts_idx = _timestamp_column(columns, rows[0])
+        rows.sort(key=lambda row: row[ts_idx])
+        landing[name] = (columns, rows, ts_idx)
+        last = datetime.fromisoformat(rows[-1][ts_idx])
+        cutoffs.append(last)
+    end = max(cutoffs) + timedelta(seconds=1)
+    boundaries = [(end - timedelta(hours=batch_hours * (increments - i))).strftime("%Y-%m-%d %H:%M:%S")
+                  for i in range(increments)] + ["9999-12-31"]
+
+    report: List[Dict] = []
+    failed: set = set()
+    lower = ""
+    for run_idx, upper in enumerate(boundaries):
+        full_refresh = run_idx == 0
+        label = "full" if full_refresh else f"incremental {run_idx}"
+        for name, (columns, rows, ts_idx) in landing.items():
+            batch = [row for row in rows if lower <= row[ts_idx] < upper]
+            began = time.perf_counter()
+            runner.load_landing(name, columns, batch, replace=full_refresh)
+            report.append({"run": label, "model": name, "materialized": "landing load",
+                           "seconds": time.perf_counter() - began, "rows_scanned": 0,
+                           "rows_written": len(batch), "peak_memory": 0, "status": "ok"})
+        lower = upper
+
+        for name in order:
+            path = project_models[name]
+            parents = [p for p in _REF.findall(path.read_text()) if p in project_models]
+            entry = {"run": label, "model": name}
+            if any(parent in failed for parent in parents):
+                failed.add(name)
+                report.append(dict(entry, status="skipped (upstream failed)"))
+                continue
+            try:
+                report.append(dict(entry, **runner.build(name, path, full_refresh), status="ok"))
+            except (duckdb.Error, _CompilerError, jinja2.TemplateError) as exc:
+                failed.add(name)
+                report.append(dict(entry, status=f"error: {str(exc).splitlines()[0]}"))
+    return report
+
+
+def print_report(report: Sequence[Mapping]) -> None:
+    print(f"{'run':<14} {'model':<38} {'materialized':<24} {'seconds':>8} {'rows scanned':>13} "
+          f"{'rows written':>13} {'peak MB':>8}  status")
+    for row in report:
+        if "seconds" not in row:
+            print(f"{row['run']:<14} {row['model']:<38} {'':<24} {'':>8} {'':>13} {'':>13} {'':>8}  {row['status']}")
+            continue
+        print(f"{row['run']:<14} {row['model']:<38} {row['materialized']:<24} {row['seconds']:>8.3f} "
+              f"{row['rows_scanned']:>13,} {row['rows_written']:>13,} {row['peak_memory'] / 1e6:>8.1f}  {row['status']}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--models", nargs="+", default=list(DEFAULT_MODELS),
+                        help="models to run (their SQL upstreams are included)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="interview_params override for both sites, YAML value (e.g. end=2025-12-31)")
+    parser.add_argument("--assets-per-type", type=int, help="scale each asset type to this many assets")
+    parser.add_argument("--increments", type=int, default=3, help="incremental runs after the full refresh")
+    parser.add_argument("--batch-hours", type=float, default=24.0, help="landing data appended per incremental run")
+    parser.add_argument("--vars", default="{}", help="dbt vars as a YAML dict")
+    parser.add_argument("--database", default=":memory:", help="DuckDB file to keep the results in")
+    parser.add_argument("--json", help="also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = yaml.safe_load(value)
+    report = run(args.models, overrides, args.assets_per_type, args.increments, args.batch_hours,
+                 yaml.safe_load(args.vars) or {}, args.database)
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+    return 1 if any(row["status"].startswith("error") for row in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
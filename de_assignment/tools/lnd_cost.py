@@ -0,0 +1,91 @@
+"""Dry-run cost plans for the landing generators, and calibration of their per-row costs.
+
+``plan`` prints what ``build_dataframe`` would do for a site config (plus overrides) without
+generating anything: rows after gaps, output size, peak memory and runtime per chunk, and
+whether ``interview_params.limits`` reject it or split it into chunks.
+
+``calibrate`` measures runtime and peak Python heap per generated row for each engine on this
+machine and prints the values to put in ``_COST_PER_ROW`` (generators) and ``COST_PER_ROW``
+(UDTF).
+
+    python tools/lnd_cost.py plan --site SITE1 --set granularity=minute --set end=2025-12-31
+    python tools/lnd_cost.py plan --site SITE1 --set engine=sharded --set 'limits={max_memory_mb: 512, on_exceed: shard}'
+    python tools/lnd_cost.py calibrate
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from typing import Optional, Sequence
+
+import yaml
+
+from lnd_local import INTERNAL_COLUMNS, SITES, LocalSession, load_generator, load_params
+
+CALIBRATION_OVERRIDES = {
+    "legacy": {"engine": "legacy"},
+    "sharded": {"engine": "sharded", "backfill": {"shard_hours": 720}},
+    "fleet": {"engine": "fleet"},
+}
+
+
+def print_plan(site: str, overrides: dict) -> int:
+    params = load_params(site, dict(overrides, dry_run=True))
+    columns, data = load_generator(site).build_dataframe(
+        LocalSession(), params, INTERNAL_COLUMNS, default_datapoints={}, require_asset_types=True)
+    print(" ".join(f"{c:>15}" for c in columns[:-1]), columns[-1])
+    for row in data:
+        print(" ".join(f"{v:>15}" for v in row[:-1]), row[-1])
+    total = {c: sum(row[columns.index(c)] for row in data) for c in ("rows", "output_mb", "runtime_seconds")}
+    peak = max(row[columns.index("peak_memory_mb")] for row in data)
+    print(f"total: {len(data)} chunk(s), {total['rows']} rows, {total['output_mb']:.1f} MB output, "
+          f"{peak:.1f} MB peak memory, {total['runtime_seconds']:.1f} s")
+    return 0 if data[0][-1] == "ok" else 1
+
+
+def calibrate(site: str, end: str) -> int:
+    generator = load_generator(site)
+    for engine, overrides in CALIBRATION_OVERRIDES.items():
+        params = load_params(site, dict(overrides, end=end))
+        cfg = generator._resolve_config(params, {}, require_asset_types=True)
+        rows = cfg["total_timesteps"] * len(cfg["asset_pairs"]) * len(cfg["datapoints"])
+
+        began = time.perf_counter()
+        generator.build_dataframe(LocalSession(), params, INTERNAL_COLUMNS, {}, require_asset_types=True)
+        seconds = (time.perf_counter() - began) / rows
+
+        # Separate run: tracemalloc slows generation down considerably
+        tracemalloc.start()
+        frame = generator.build_dataframe(LocalSession(), params, INTERNAL_COLUMNS, {}, require_asset_types=True)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del frame
+        print(f'"{engine}": {{"seconds": {seconds * 1e6:.1f}e-6, "peak_bytes": {peak / rows:.0f}}},  # {rows} rows')
+    return 0
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_cmd = commands.add_parser("plan", help="print the dry-run plan of a site config")
+    plan_cmd.add_argument("--site", required=True, choices=SITES)
+    plan_cmd.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                          help="interview_params override, YAML value")
+
+    calibrate_cmd = commands.add_parser("calibrate", help="measure per-row runtime and peak memory per engine")
+    calibrate_cmd.add_argument("--site", default="SITE1", choices=SITES)
+    calibrate_cmd.add_argument("--end", default="2025-04-01", help="shorter or longer run than the site config")
+
+    args = parser.parse_args(argv)
+    if args.command == "calibrate":
+        return calibrate(args.site, args.end)
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = yaml.safe_load(value)
+    return print_plan(args.site, overrides)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Golden-fixture equivalence harness for the landing data generators.
+
+``legacy`` is the only engine whose output is fixed per seed: its per-series hashes for the
+SITE1/SITE2 configs (both build_dataframe and the UDTF) must match ``fixtures/lnd_golden.json``
+exactly. Faster engines change the order of random draws, so they are checked against the
+statistical properties recorded for ``legacy`` instead (value range, lag-1 autocorrelation,
+gap and anomaly fractions). Slices produced from a legacy snapshot index (``lnd_slice.py``)
+must match the same rows of the full run.
+
+    python tools/lnd_equivalence.py             # check everything
+    python tools/lnd_equivalence.py --update    # re-record the fixture after an intended change
+"""
+import argparse
+import hashlib
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Mapping
+
+from lnd_local import SITES, generate_rows, load_generator, load_params, udtf_rows
+
+GOLDEN_PATH = Path(__file__).resolve().parent / "fixtures" / "lnd_golden.json"
+
+# interview_params overrides per non-legacy engine, applied on top of each site config
+ENGINE_OVERRIDES: Dict[str, Dict] = {
+    "sharded": {"engine": "sharded", "backfill": {"shard_hours": 720, "burn_in_hours": 48}},
+    "fleet": {"engine": "fleet"},
+}
+
+# Snapshot spacing (timesteps) and slice windows (fractions of the timeline) checked against the full run
+SLICE_INTERVAL = 500
+SLICE_WINDOWS = ((0.0, 0.01), (0.37, 0.42), (0.98, 1.0))
+
+# Allowed absolute difference from the legacy statistics
+TOLERANCES = {
+    "gap_fraction": 0.005,
+    "in_range_fraction": 0.02,
+    "lag1_autocorr": 0.05,
+    "spike_fraction": 0.003,
+}
+
+
+def _format_value(value) -> str:
+    # build_dataframe emits 3-decimal strings, the UDTF raw floats; repr keeps floats exact
+    return value if isinstance(value, str) else repr(value)
+
+
+def _format_ts(ts) -> str:
+    return ts if isinstance(ts, str) else ts.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _group_series(rows: List[Mapping]) -> Dict[str, List[Mapping]]:
+    series: Dict[str, List[Mapping]] = {}
+    for row in rows:
+        series.setdefault(f"{row['asset_id']}|{row['datapoint']}", []).append(row)
+    for values in series.values():
+        values.sort(key=lambda r: _format_ts(r["ts"]))
+    return series
+
+
+def series_digests(rows: List[Mapping]) -> Dict[str, Dict]:
+    digests: Dict[str, Dict] = {}
+    for key, values in sorted(_group_series(rows).items()):
+        sha = hashlib.sha256()
+        for row in values:
+            sha.update(f"{_format_ts(row['ts'])},{_format_value(row['value'])}\n".encode())
+        digests[key] = {"rows": len(values), "sha256": sha.hexdigest()}
+    return digests
+
+
+def series_stats(rows: List[Mapping], params: Mapping) -> Dict[str, float]:
+    """Site-level properties that any engine must reproduce within TOLERANCES."""
+    datapoints = {name: (float(rng[0]), float(rng[1])) for name, rng in params["datapoints"].items()}
+    severity = float(params.get("anomaly_severity", 0.10))
+    series = _group_series(rows)
+    timesteps = len({_format_ts(row["ts"]) for row in rows})
+
+    in_range = 0
+    spikes = 0
+    interior = 0
+    autocorrs: List[float] = []
+    for values in series.values():
+        mn, mx = datapoints[values[0]["datapoint"]]
+        xs = [float(row["value"]) for row in values]
+        in_range += sum(1 for x in xs if mn <= x <= mx)
+        # Isolated deviations of at least half the configured anomaly severity
+        threshold = 0.5 * severity * (mx - mn)
+        for i in range(1, len(xs) - 1):
+            interior += 1
+            if xs[i] != 0.0 and abs(xs[i] - (xs[i - 1] + xs[i + 1]) / 2.0) > threshold:
+                spikes += 1
+        mean = sum(xs) / len(xs)
+        var = sum((x - mean) ** 2 for x in xs)
+        if var > 0:
+            autocorrs.append(sum((xs[i] - mean) * (xs[i + 1] - mean) for i in range(len(xs) - 1)) / var)
+
+    return {
+        "gap_fraction": 1.0 - len(rows) / float(timesteps * len(series)),
+        "in_range_fraction": in_range / float(len(rows)),
+        "lag1_autocorr": sum(autocorrs) / len(autocorrs) if autocorrs else math.nan,
+        "spike_fraction": spikes / float(interior) if interior else 0.0,
+    }
+
+
+def params_digest(params: Mapping) -> str:
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def check_slices(site: str, params: Mapping, rows: List[Mapping]) -> List[str]:
+    """Slices of every single series from a snapshot index must equal the full run's rows."""
+    generator = load_generator(site)
+    index = generator.build_snapshot_index(params, SLICE_INTERVAL, default_datapoints={}, require_asset_types=True)
+    full = _group_series(rows)
+    timestamps = sorted({row["ts"] for row in rows})
+    failures: List[str] = []
+    for key, expected in sorted(full.items()):
+        asset_id, datapoint = key.split("|")
+        for lo, hi in SLICE_WINDOWS:
+            window_start = timestamps[int(lo * (len(timestamps) - 1))]
+            window_end = timestamps[int(hi * (len(timestamps) - 1))]
+            actual = generator.generate_slice(params, index, [asset_id], [datapoint], window_start, window_end,
+                                              default_datapoints={}, require_asset_types=True)
+            if actual != [row for row in expected if window_start <= row["ts"] <= window_end]:
+                failures.append(f"{site} legacy slice: series {key} [{window_start}, {window_end}] differs from full run")
+    print(f"{site} legacy slices: {len(full) * len(SLICE_WINDOWS) - len(failures)}/{len(full) * len(SLICE_WINDOWS)} match")
+    return failures
+
+
+def record(sites) -> Dict:
+    golden: Dict = {}
+    for site in sites:
+        params = load_params(site)
+        rows = generate_rows(site, params)
+        golden[site] = {
+            "params_sha256": params_digest(params),
+            "generator": series_digests(rows),
+            "udtf": series_digests(udtf_rows(params)),
+            "stats": series_stats(rows, params),
+        }
+    return golden
+
+
+def check(sites, engines, check_udtf: bool) -> List[str]:
+    golden = json.loads(GOLDEN_PATH.read_text())
+    failures: List[str] = []
+    for site in sites:
+        params = load_params(site)
+        expected = golden[site]
+        if params_digest(params) != expected["params_sha256"]:
+            failures.append(f"{site}: interview_params changed since the fixture was recorded; rerun with --update")
+            continue
+
+        rows = generate_rows(site, params)
+        targets = [("generator", lambda: rows)]
+        if check_udtf:
+            targets.append(("udtf", lambda: udtf_rows(params)))
+        for target, produce in targets:
+            actual = series_digests(produce())
+            mismatched = sorted(k for k in expected[target] if actual.get(k) != expected[target][k])
+            extra = sorted(set(actual) - set(expected[target]))
+            print(f"{site} legacy {target}: {len(expected[target]) - len(mismatched)}/{len(expected[target])} series match")
+            for key in mismatched + extra:
+                failures.append(f"{site} legacy {target}: series {key} differs from golden output")
+        failures.extend(check_slices(site, params, rows))
+
+        for engine in engines:
+            engine_params = dict(params, **ENGINE_OVERRIDES[engine])
+            stats = series_stats(generate_rows(site, engine_params), engine_params)
+            for metric, tolerance in TOLERANCES.items():
+                delta = abs(stats[metric] - expected["stats"][metric])
+                status = "ok" if delta <= tolerance else "FAIL"
+                print(f"{site} {engine} {metric}: {stats[metric]:.4f} (legacy {expected['stats'][metric]:.4f}) {status}")
+                if delta > tolerance:
+                    failures.append(f"{site} {engine}: {metric} {stats[metric]:.4f} deviates from legacy "
+                                    f"{expected['stats'][metric]:.4f} by more than {tolerance}")
+    return failures
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="re-record the golden fixture from the legacy engine")
+    parser.add_argument("--sites", nargs="+", default=list(SITES), choices=SITES)
+    parser.add_argument("--engines", nargs="*", default=list(ENGINE_OVERRIDES), choices=list(ENGINE_OVERRIDES),
+                        help="non-legacy engines to check statistically (default: all)")
+    parser.add_argument("--skip-udtf", action="store_true", help="only check build_dataframe, not the UDTF")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        golden = json.loads(GOLDEN_PATH.read_text()) if GOLDEN_PATH.exists() else {}
+        golden.update(record(args.sites))
+        GOLDEN_PATH.parent.mkdir(parents=True, exist_ok=True)
+        GOLDEN_PATH.write_text(json.dumps(golden, indent=2, sort_keys=True) + "\n")
+        print(f"recorded {', '.join(args.sites)} into {GOLDEN_PATH}")
+        return 0
+
+    failures = check(args.sites, args.engines, not args.skip_udtf)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+"""Compressed, block-indexed fixture format for generated landing series (``.lndz``).
+
+Generated series sit on a fixed step timeline with occasional gaps and move in small steps, so
+each block of up to ``BLOCK_POINTS`` points of one asset x datapoint series is stored as:
+
+- timestamps: delta-of-delta in timesteps (almost all zeros; a gap is one non-zero pair)
+- values: ``q3`` deltas of the values quantized to 3 decimals when that is exact (build_dataframe
+  output, which is rounded to 3 decimals), otherwise ``xor`` of consecutive float64 bit patterns
+  (UDTF output)
+
+Each stream is packed at the smallest integer width that fits the block (1, 2, 4 or 8 bytes) and
+zlib-compressed. The index of blocks (series key, first/last timestep, offsets) is written after
+the blocks, so files are written in one pass and readers can seek straight to the blocks of one
+series or window. Decoding is lossless: rows read back are equal to the rows written.
+
+Decoding uses numpy when installed (vectorized cumulative sums, the fast path for large fixtures)
+and falls back to the standard library otherwise.
+
+    python tools/lnd_fixture_codec.py encode --site SITE1         # target/lnd_fixtures/SITE1.lndz
+    python tools/lnd_fixture_codec.py decode target/lnd_fixtures/SITE1.lndz --out site1.csv
+    python tools/lnd_fixture_codec.py bench target/lnd_fixtures/SITE1.lndz
+"""
+import argparse
+import csv
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from lnd_local import INTERNAL_COLUMNS, PROJECT_DIR, SITES, generate_rows, load_params
+from lnd_series_store import TS_FORMAT, site_header
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the standard library decoder is used instead
+    np = None
+
+MAGIC = b"LNDZ0001"
+FOOTER = struct.Struct("<QQ8s")  # index offset, index length, magic
+BLOCK_POINTS = 65536
+FIXTURE_DIR = PROJECT_DIR / "target" / "lnd_fixtures"
+
+# (array typecode, numpy dtype) per packed width; array's "q" is 8 bytes on every platform
+_WIDTHS = {1: ("b", "<i1"), 2: ("h", "<i2"), 4: ("l" if array("l").itemsize == 4 else "i", "<i4"), 8: ("q", "<i8")}
+_LIMITS = {1: 1 << 7, 2: 1 << 15, 4: 1 << 31, 8: 1 << 63}
+
+
+def _pack(ints: List[int]) -> Tuple[int, bytes]:
+    lo = min(ints, default=0)
+    hi = max(ints, default=0)
+    width = next(w for w, limit in _LIMITS.items() if -limit <= lo and hi < limit)
+    packed = array(_WIDTHS[width][0], ints)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return width, zlib.compress(packed.tobytes(), 6)
+
+
+def _unpack_list(data: bytes, width: int) -> List[int]:
+    packed = array(_WIDTHS[width][0])
+    packed.frombytes(zlib.decompress(data))
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tolist()
+
+
+def _float_bits(value: float) -> int:
+    return struct.unpack("<q", struct.pack("<d", value))[0]
+
+
+def _bits_float(bits: int) -> float:
+    return struct.unpack("<d", struct.pack("<q", bits))[0]
+
+
+def _encode_block(steps: List[int], values: List, as_strings: bool) -> Tuple[Dict, bytes]:
+    """Encode one block; ``steps`` are timestep indexes on the file timeline."""
+    deltas = [b - a for a, b in zip(steps, steps[1:])]
+    # Delta-of-delta against the nominal one-step spacing: a regular run is all zeros
+    dods = [d - p for p, d in zip([1] + deltas, deltas)]
+    ts_width, ts_data = _pack(dods)
+
+    floats = [float(v) for v in values]
+    quantized = [round(v * 1000) for v in floats]
+    if as_strings:
+        exact = all(f"{q / 1000:.3f}" == v for q, v in zip(quantized, values))
+    else:
+        exact = all(q / 1000 == v for q, v in zip(quantized, floats))
+    if exact:
+        mode, first, ints = "q3", quantized[0], quantized
+        diffs = [b - a for a, b in zip(ints, ints[1:])]
+    else:
+        bits = [_float_bits(v) for v in floats]
+        mode, first = "xor", bits[0]
+        diffs = [a ^ b for a, b in zip(bits, bits[1:])]
+    value_width, value_data = _pack(diffs)
+
+    entry = {
+        "count": len(steps),
+        "first_step": steps[0],
+        "last_step": steps[-1],
+        "ts_width": ts_width,
+        "ts_bytes": len(ts_data),
+        "value_mode": mode,
+        "first_value": first,
+        "value_width": value_width,
+        "value_bytes": len(value_data),
+    }
+    return entry, ts_data + value_data
+
+
+def write_fixture(path: Path, header: Mapping, rows: Sequence[Mapping], block_points: int = BLOCK_POINTS) -> Path:
+    """Encode rows (internal column names) into ``path``; ``header`` as from lnd_series_store.site_header."""
+    start = datetime.strptime(header["timeline"]["start"], TS_FORMAT)
+    step_seconds = float(header["timeline"]["step_seconds"])
+    as_strings = bool(rows) and isinstance(rows[0]["value"], str)
+
+    grouped: Dict[Tuple[str, str], List[Tuple[int, object]]] = {
+        (s["asset_id"], s["datapoint"]): [] for s in header["series"]}
+    for row in rows:
+        ts = row["ts"] if isinstance(row["ts"], datetime) else datetime.strptime(row["ts"], TS_FORMAT)
+        grouped[(row["asset_id"], row["datapoint"])].append(
+            (round((ts - start).total_seconds() / step_seconds), row["value"]))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    blocks: List[Dict] = []
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        for series_idx, series in enumerate(header["series"]):
+            points = sorted(grouped[(series["asset_id"], series["datapoint"])], key=lambda p: p[0])
+            for lo in range(0, len(points), block_points):
+                chunk = points[lo:lo + block_points]
+                entry, data = _encode_block([p[0] for p in chunk], [p[1] for p in chunk], as_strings)
+                entry.update(series=series_idx, offset=f.tell())
+                f.write(data)
+                blocks.append(entry)
+        index = json.dumps(dict(header, value_type="str" if as_strings else "float", blocks=blocks)).encode()
+        index_offset = f.tell()
+        f.write(zlib.compress(index))
+        f.write(FOOTER.pack(index_offset, f.tell() - index_offset, MAGIC))
+    return path
+
+
+class FixtureReader:
+    """Streaming reader: decodes one block at a time, reading only the blocks a query needs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._file.seek(-FOOTER.size, 2)
+        index_offset, index_len, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+        self._file.seek(0)
+        if self._file.read(len(MAGIC)) != MAGIC or magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not an .lndz fixture")
+        self._file.seek(index_offset)
+        self.header: Dict = json.loads(zlib.decompress(self._file.read(index_len)))
+        self.series: List[Dict] = self.header["series"]
+        self.start = datetime.strptime(self.header["timeline"]["start"], TS_FORMAT)
+        self.step = timedelta(seconds=float(self.header["timeline"]["step_seconds"]))
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "FixtureReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _step_of(self, ts) -> int:
+        ts = ts if isinstance(ts, datetime) else datetime.fromisoformat(str(ts))
+        return int((ts - self.start) / self.step)
+
+    def _read(self, entry: Mapping) -> Tuple[bytes, bytes]:
+        self._file.seek(entry["offset"])
+        data = self._file.read(entry["ts_bytes"] + entry["value_bytes"])
+        return data[:entry["ts_bytes"]], data[entry["ts_bytes"]:]
+
+    def decode_block(self, entry: Mapping):
+        """(timestep indexes, values) of one block: numpy arrays if available, else lists of ints/floats."""
+        ts_data, value_data = self._read(entry)
+        q3 = entry["value_mode"] == "q3"
+        if np is not None:
+            dods = np.frombuffer(zlib.decompress(ts_data), dtype=_WIDTHS[entry["ts_width"]][1]).astype(np.int64)
+            steps = np.empty(entry["count"], dtype=np.int64)
+            steps[0] = entry["first_step"]
+            np.cumsum(np.cumsum(dods) + 1, out=steps[1:])
+            steps[1:] += entry["first_step"]
+            diffs = np.frombuffer(zlib.decompress(value_data), dtype=_WIDTHS[entry["value_width"]][1]).astype(np.int64)
+            ints = np.empty(entry["count"], dtype=np.int64)
+            ints[0] = entry["first_value"]
+            if q3:
+                np.cumsum(diffs, out=ints[1:])
+                ints[1:] += entry["first_value"]
+                return steps, ints / 1000.0
+            ints[1:] = diffs
+            return steps, np.bitwise_xor.accumulate(ints).view(np.float64)
+
+        dods = _unpack_list(ts_data, entry["ts_width"])
+        deltas = accumulate(dods, initial=1)
+        next(deltas)
+        steps = list(accumulate(deltas, initial=entry["first_step"]))
+        diffs = _unpack_list(value_data, entry["value_width"])
+        if q3:
+            return steps, [q / 1000.0 for q in accumulate(diffs, initial=entry["first_value"])]
+        return steps, [_bits_float(b) for b in accumulate(diffs, lambda a, b: a ^ b, initial=entry["first_value"])]
+
+    def iter_blocks(self, asset_ids: Optional[Sequence[str]] = None, datapoints: Optional[Sequence[str]] = None,
+                    start=None, end=None) -> Iterator[Tuple[Dict, object, object]]:
+        """Yield (series, timestep indexes, values) per block overlapping [start, end)."""
+        lo = None if start is None else self._step_of(start)
+        hi = None if end is None else self._step_of(end)
+        for entry in self.header["blocks"]:
+            series = self.series[entry["series"]]
+            if asset_ids is not None and series["asset_id"] not in asset_ids:
+                continue
+            if datapoints is not None and series["datapoint"] not in datapoints:
+                continue
+            if (lo is not None and entry["last_step"] < lo) or (hi is not None and entry["first_step"] >= hi):
+                continue
+            steps, values = self.decode_block(entry)
+            yield series, steps, values
+
+    def iter_rows(self, **query) -> Iterator[Dict]:
+        """Rows as written (internal column names); string values come back in their 3-decimal form."""
+        lo = None if query.get("start") is None else self._step_of(query["start"])
+        hi = None if query.get("end") is None else self._step_of(query["end"])
+        as_strings = self.header["value_type"] == "str"
+        for series, steps, values in self.iter_blocks(**query):
+            for step, value in zip(steps, values):
+                step = int(step)
+                if (lo is not None and step < lo) or (hi is not None and step >= hi):
+                    continue
+                yield {
+                    "customer": self.header["customer"],
+                    "site": self.header["site"],
+                    "asset_type": series["asset_type"],
+                    "asset_id": series["asset_id"],
+                    "ts": (self.start + self.step * step).strftime(TS_FORMAT),
+                    "datapoint": series["datapoint"],
+                    "value": f"{value:.3f}" if as_strings else float(value),
+                }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    encode_cmd = commands.add_parser("encode", help="run a site's generator and write its fixture")
+    encode_cmd.add_argument("--site", required=True, choices=SITES)
+    encode_cmd.add_argument("--engine", help="override interview_params.engine")
+    encode_cmd.add_argument("--out", help=f"fixture path (default: {FIXTURE_DIR}/<site>.lndz)")
+
+    decode_cmd = commands.add_parser("decode", help="write a fixture's rows as CSV")
+    decode_cmd.add_argument("path")
+    decode_cmd.add_argument("--assets", nargs="+")
+    decode_cmd.add_argument("--datapoints", nargs="+")
+    decode_cmd.add_argument("--start")
+    decode_cmd.add_argument("--end")
+    decode_cmd.add_argument("--out", help="CSV path (default: stdout)")
+
+    bench_cmd = commands.add_parser("bench", help="measure block decoding throughput")
+    bench_cmd.add_argument("path")
+    bench_cmd.add_argument("--repeat", type=int, default=5)
+
+    args = parser.parse_args(argv)
+    if args.command == "encode":
+        params = load_params(args.site, {"engine": args.engine} if args.engine else None)
+        rows = generate_rows(args.site, params)
+        path = write_fixture(Path(args.out) if args.out else FIXTURE_DIR / f"{args.site}.lndz",
+                             site_header(args.site, params), rows)
+        size = path.stat().st_size
+        print(f"wrote {len(rows)} rows to {path} ({size / 1e3:.1f} kB, {8 * size / max(1, len(rows)):.2f} bits/row)")
+        return 0
+
+    with FixtureReader(Path(args.path)) as reader:
+        if args.command == "decode":
+            out = open(args.out, "w", newline="") if args.out else sys.stdout
+            writer = csv.DictWriter(out, fieldnames=list(INTERNAL_COLUMNS))
+            writer.writeheader()
+            writer.writerows(reader.iter_rows(asset_ids=args.assets, datapoints=args.datapoints,
+                                              start=args.start, end=args.end))
+            if args.out:
+                out.close()
+            return 0
+
+        points = sum(entry["count"] for entry in reader.header["blocks"])
+        began = time.perf_counter()
+        for _ in range(args.repeat):
+            for _ in reader.iter_blocks():
+                pass
+        elapsed = (time.perf_counter() - began) / args.repeat
+        print(f"decoded {points} points in {elapsed * 1e3:.1f} ms ({points / elapsed / 1e6:.1f} M points/s, "
+              f"{'numpy' if np is not None else 'standard library'} decoder)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
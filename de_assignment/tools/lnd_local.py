@@ -0,0 +1,130 @@
+"""Run the 0_lnd landing generators and the mock-data UDTF locally, without Snowflake.
+
+The generator models and the UDTF body are loaded straight from the dbt project, so the
+local tools always exercise exactly the code that dbt deploys.
+"""
+import importlib.util
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import yaml
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+LND_DIR = PROJECT_DIR / "models" / "interview" / "0_lnd"
+UDTF_MACRO = PROJECT_DIR / "macros" / "deploy_generate_asset_mock_data_udtf.sql"
+SITES = ("SITE1", "SITE2")
+
+# build_dataframe's internal row keys, passed through unaliased
+INTERNAL_COLUMNS = {key: key for key in ("customer", "site", "asset_type", "asset_id", "ts", "datapoint", "value")}
+
+
+class LocalDataFrame(tuple):
+    """(columns, rows) with the one DataFrame method build_dataframe uses on auto-sharded runs."""
+
+    def union_all(self, other: "LocalDataFrame") -> "LocalDataFrame":
+        return LocalDataFrame((self[0], self[1] + other[1]))
+
+
+class LocalSession:
+    """Stands in for the Snowpark session: create_dataframe hands back (columns, rows) as-is."""
+
+    def create_dataframe(self, data, schema):
+        return LocalDataFrame((list(schema), data))
+
+
+class LocalDbt:
+    """Stands in for the ``dbt`` object of a Python model: config() is a no-op, config.get reads ``meta``."""
+
+    def __init__(self, params: Mapping):
+        self.config = lambda **kwargs: None
+        self.config.get = {"meta": {"interview_params": dict(params)}}.get
+
+
+def load_generator(site: str):
+    name = f"generate_lnd_interview_data_{site}"
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, LND_DIR / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered before exec so worker processes (engine: sharded, workers > 1) can unpickle its functions
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_params(site: str, overrides: Optional[Mapping] = None) -> Dict:
+    with open(LND_DIR / f"generate_lnd_interview_data_{site}.yml") as f:
+        config = yaml.safe_load(f)
+    params = dict(config["models"][0]["config"]["meta"]["interview_params"])
+    params.update(overrides or {})
+    return params
+
+
+def generate_rows(site: str, params: Optional[Mapping] = None) -> List[Dict[str, str]]:
+    """Run build_dataframe for a site and return its rows keyed by the internal column names."""
+    params = load_params(site) if params is None else params
+    columns, data = load_generator(site).build_dataframe(
+        session=LocalSession(),
+        params=params,
+        column_aliases=INTERNAL_COLUMNS,
+        default_datapoints={},
+        require_asset_types=True,
+    )
+    return [dict(zip(columns, row)) for row in data]
+
+
+def run_model(site: str, params: Optional[Mapping] = None) -> Tuple[List[str], List[List[str]]]:
+    """Run a site's dbt ``model()`` and return (output columns, rows) as the LND table would hold them."""
+    params = load_params(site) if params is None else params
+    return load_generator(site).model(LocalDbt(params), LocalSession())
+
+
+def load_udtf_class():
+    """Extract the Python handler from the deploy macro and return the SyntheticDataGenerator class."""
+    source = UDTF_MACRO.read_text()
+    body = source.split("AS $$", 1)[1].split("$$", 1)[0]
+    namespace: Dict = {"__name__": "generate_asset_mock_data_udtf"}
+    exec(compile(body, str(UDTF_MACRO), "exec"), namespace)
+    return namespace["SyntheticDataGenerator"]
+
+
+def udtf_rows(params: Mapping, shard_start_date: Optional[str] = None, shard_end_date: Optional[str] = None,
+              burn_in_hours: float = 48, engine: Optional[str] = None, max_rows: Optional[int] = None,
+              max_memory_mb: Optional[float] = None, dry_run: bool = False) -> List[Dict]:
+    """Run one UDTF partition with the arguments a SQL call would pass for ``interview_params``."""
+    handler = load_udtf_class()()
+    handler.process(
+        str(params.get("start", "2025-01-01")),
+        str(params.get("end", "2025-01-10")),
+        str(params.get("granularity", "hour")),
+        str(params.get("customer", "CG")),
+        str(params.get("site", "TEST")),
+        json.dumps(params.get("asset_types", {})),
+        json.dumps(params.get("datapoints", {})),
+        params.get("gaps", 0.0),
+        params.get("anomalies", 0.0),
+        params.get("anomaly_severity", 0.10),
+        params.get("correlation_lag_minutes", 60),
+        params.get("drift_enabled", True),
+        params.get("drift_magnitude", 0.4),
+        params.get("drift_period_hours", 168.0),
+        params.get("setpoint_changes", 0),
+        params.get("setpoint_change_speed", 0.15),
+        params.get("setpoint_change_magnitude", 0.3),
+        params.get("sensor_failures", 0),
+        params.get("sensor_failure_duration_hours", 12.0),
+        params.get("sensor_failure_type", "erratic"),
+        params.get("seed"),
+        shard_start_date,
+        shard_end_date,
+        burn_in_hours,
+        engine,
+        max_rows,
+        max_memory_mb,
+        dry_run,
+        json.dumps(params["fleet"]) if params.get("fleet") else None,
+    )
+    keys = ("customer", "site", "asset_type", "asset_id", "ts", "datapoint", "value")
+    return [dict(zip(keys, row)) for row in handler.end_partition()]
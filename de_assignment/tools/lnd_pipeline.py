@@ -0,0 +1,81 @@
+"""Tune the pipelined upload of the landing generators against a simulated warehouse connection.
+
+Runs ``build_dataframe`` with ``interview_params.pipeline`` for every combination of
+``--uploaders`` and ``--queue-batches`` and prints the pipeline metrics. Uploads go to a
+local session that sleeps for a fixed latency plus the batch size over a bandwidth, and fails
+a fraction of calls to exercise the retries. High ``producer_wait`` means the uploads are the
+bottleneck (more uploaders); high ``uploader_wait`` means generation is (more backfill workers).
+
+    python tools/lnd_pipeline.py --site SITE1 --set engine=sharded --set 'backfill={shard_hours: 168}'
+    python tools/lnd_pipeline.py --site SITE1 --uploaders 1 2 4 8 --latency-ms 200 --mb-per-second 5
+"""
+import argparse
+import itertools
+import random
+import sys
+import threading
+import time
+from typing import Optional, Sequence
+
+import yaml
+
+from lnd_local import INTERNAL_COLUMNS, SITES, LocalSession, load_generator, load_params
+
+COLUMNS = ("uploaders", "queue_batches", "batches", "rows", "wall_seconds", "rows_per_second", "produce_seconds",
+           "upload_seconds", "producer_wait_seconds", "uploader_wait_seconds", "max_queue_depth", "retries")
+
+
+class SimulatedSession(LocalSession):
+    """LocalSession whose create_dataframe takes as long as an upload over the given connection."""
+
+    def __init__(self, latency_seconds: float, bytes_per_second: float, failure_rate: float, seed: int = 0):
+        self.latency_seconds = latency_seconds
+        self.bytes_per_second = bytes_per_second
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def create_dataframe(self, data, schema):
+        size = sum(len(value) + 1 for row in data for value in row)
+        time.sleep(self.latency_seconds + size / self.bytes_per_second)
+        with self._lock:
+            failed = self._rng.random() < self.failure_rate
+        if failed:
+            raise ConnectionError("simulated upload failure")
+        return super().create_dataframe(data, schema)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--site", default="SITE1", choices=SITES)
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="interview_params override, YAML value")
+    parser.add_argument("--uploaders", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--queue-batches", nargs="+", type=int, default=[2])
+    parser.add_argument("--batch-rows", type=int, default=50000)
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="fixed cost per upload call")
+    parser.add_argument("--mb-per-second", type=float, default=10.0, help="upload bandwidth per uploader")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of upload calls that fail")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for item in args.set:
+        key, _, value = item.partition("=")
+        overrides[key] = yaml.safe_load(value)
+    generator = load_generator(args.site)
+
+    print(" ".join(COLUMNS))
+    for uploaders, queue_batches in itertools.product(args.uploaders, args.queue_batches):
+        pipeline = {"uploaders": uploaders, "queue_batches": queue_batches, "batch_rows": args.batch_rows,
+                    "retry_backoff_seconds": 0.05}
+        params = load_params(args.site, dict(overrides, pipeline=pipeline))
+        session = SimulatedSession(args.latency_ms / 1000.0, args.mb_per_second * 1e6, args.failure_rate)
+        metrics: dict = {}
+        generator.build_dataframe(session, params, INTERNAL_COLUMNS, {}, require_asset_types=True, metrics=metrics)
+        print(" ".join(f"{metrics[c]:>{len(c)}.3f}" if isinstance(metrics[c], float) else f"{metrics[c]:>{len(c)}}"
+                       for c in COLUMNS))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
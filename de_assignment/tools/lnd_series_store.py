@@ -0,0 +1,252 @@
+"""Memory-mapped on-disk store for generated landing series.
+
+A store holds one site's output as a dense series x timestep matrix of float32 or float64 values,
+so offline DQ and imputation experiments can open it without regenerating or re-parsing rows::
+
+    offset  size  content
+    0       48    preamble: magic, version, itemsize, header/bitmap/data offsets
+    48      n     JSON header: customer, site, timeline (start, step_seconds, timesteps), series keys
+    ...           gap bitmap: one bit per (series, timestep), 1 = row present, rows padded to whole bytes
+    ...           value matrix, row-major (one row per series), gaps stored as NaN; 64-byte aligned
+
+Readers map the file read-only, so opening is O(header) regardless of file size, slices are
+zero-copy views on the page cache, and several processes opening the same store share its pages.
+Slices stay valid until the store is closed; ``close()`` releases them, so copy what must outlive it.
+
+    python tools/lnd_series_store.py write --site SITE1                 # target/lnd_series/SITE1.f64
+    python tools/lnd_series_store.py info target/lnd_series/SITE1.f64
+"""
+import argparse
+import itertools
+import json
+import math
+import mmap
+import struct
+import sys
+import weakref
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from lnd_local import PROJECT_DIR, SITES, generate_rows, load_generator, load_params
+
+MAGIC = b"LNDSTORE"
+VERSION = 1
+PREAMBLE = struct.Struct("<8sIIQQQQ")  # magic, version, itemsize, header offset, header length, bitmap offset, data offset
+ALIGN = 64
+TYPECODES = {4: "f", 8: "d"}
+STORE_DIR = PROJECT_DIR / "target" / "lnd_series"
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_store(path: Path, header: Mapping, rows: Iterable[Mapping], itemsize: int = 8) -> Path:
+    """Write rows (internal column names, as from lnd_local.generate_rows) into a store at ``path``.
+
+    ``header`` needs ``timeline`` (start, step_seconds, timesteps) and ``series`` (list of
+    {asset_type, asset_id, datapoint}); series not listed there are rejected.
+    """
+    if itemsize not in TYPECODES:
+        raise ValueError("itemsize must be 4 (float32) or 8 (float64)")
+    timeline = header["timeline"]
+    timesteps = int(timeline["timesteps"])
+    start = datetime.strptime(timeline["start"], TS_FORMAT)
+    step_seconds = float(timeline["step_seconds"])
+    series_index = {(s["asset_id"], s["datapoint"]): i for i, s in enumerate(header["series"])}
+
+    header_bytes = json.dumps(header, sort_keys=True).encode()
+    header_offset = PREAMBLE.size
+    bitmap_offset = _align(header_offset + len(header_bytes))
+    bitmap_row = (timesteps + 7) // 8
+    data_offset = _align(bitmap_offset + bitmap_row * len(series_index))
+    row_bytes = timesteps * itemsize
+    size = data_offset + row_bytes * len(series_index)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w+b") as f:
+        f.truncate(max(size, 1))
+        with mmap.mmap(f.fileno(), max(size, 1)) as buf:
+            buf[:PREAMBLE.size] = PREAMBLE.pack(MAGIC, VERSION, itemsize, header_offset, len(header_bytes),
+                                                bitmap_offset, data_offset)
+            buf[header_offset:header_offset + len(header_bytes)] = header_bytes
+            nan_row = struct.pack(f"<{TYPECODES[itemsize]}", math.nan) * timesteps
+            for i in range(len(series_index)):
+                buf[data_offset + i * row_bytes:data_offset + (i + 1) * row_bytes] = nan_row
+
+            values = memoryview(buf)[data_offset:size].cast(TYPECODES[itemsize])
+            bitmap = memoryview(buf)[bitmap_offset:bitmap_offset + bitmap_row * len(series_index)]
+            try:
+                for row in rows:
+                    key = (row["asset_id"], row["datapoint"])
+                    if key not in series_index:
+                        raise ValueError(f"series {key} is not in the store header")
+                    ts = row["ts"] if isinstance(row["ts"], datetime) else datetime.strptime(row["ts"], TS_FORMAT)
+                    ts_idx = round((ts - start).total_seconds() / step_seconds)
+                    if not 0 <= ts_idx < timesteps:
+                        raise ValueError(f"timestamp {row['ts']} is outside the store timeline")
+                    s = series_index[key]
+                    values[s * timesteps + ts_idx] = float(row["value"])
+                    bitmap[s * bitmap_row + ts_idx // 8] |= 1 << (ts_idx % 8)
+            finally:
+                values.release()
+                bitmap.release()
+            buf.flush()
+    return path
+
+
+class SeriesStore:
+    """Read-only, zero-copy view of a store written by ``write_store``."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, itemsize, header_offset, header_len, bitmap_offset, data_offset = \
+            PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{self.path} is not a version {VERSION} series store")
+        self.header: Dict = json.loads(self._mmap[header_offset:header_offset + header_len])
+        self.itemsize = itemsize
+        self.timesteps = int(self.header["timeline"]["timesteps"])
+        self.start = datetime.strptime(self.header["timeline"]["start"], TS_FORMAT)
+        self.step = timedelta(seconds=float(self.header["timeline"]["step_seconds"]))
+        self.series: List[Dict] = self.header["series"]
+        self._series_index = {(s["asset_id"], s["datapoint"]): i for i, s in enumerate(self.series)}
+        self._bitmap_row = (self.timesteps + 7) // 8
+        view = memoryview(self._mmap)
+        self._bitmap = view[bitmap_offset:bitmap_offset + self._bitmap_row * len(self.series)]
+        self._values = view[data_offset:data_offset + self.timesteps * itemsize * len(self.series)].cast(
+            TYPECODES[itemsize])
+        # Live slices handed out by values(): the mapping cannot be closed while any of them is alive.
+        # Held weakly so dropped slices do not pile up; keyed by a counter as float views are unhashable
+        self._exported: "weakref.WeakValueDictionary[int, memoryview]" = weakref.WeakValueDictionary()
+        self._export_ids = itertools.count()
+
+    def close(self) -> None:
+        """Release every still-alive slice returned by ``values()`` and unmap the file.
+
+        Raises ``BufferError`` if an array from ``matrix()`` is still alive; the file is closed regardless.
+        """
+        try:
+            exported = self.__dict__.pop("_exported", None)
+            for view in list(exported.values()) if exported is not None else []:
+                view.release()
+            for name in ("_values", "_bitmap"):
+                view = self.__dict__.pop(name, None)
+                if view is not None:
+                    view.release()
+            self._mmap.close()
+        finally:
+            self._file.close()
+
+    def __enter__(self) -> "SeriesStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def timestep_index(self, ts) -> int:
+        """Index of the first timestep at or after ``ts`` (datetime or 'YYYY-MM-DD[ HH:MM:SS]')."""
+        if not isinstance(ts, datetime):
+            ts = datetime.fromisoformat(str(ts))
+        return min(self.timesteps, max(0, math.ceil((ts - self.start) / self.step)))
+
+    def timestamp(self, ts_idx: int) -> datetime:
+        return self.start + self.step * ts_idx
+
+    def _window(self, asset_id: str, datapoint: str, start, end) -> Tuple[int, int, int]:
+        key = (asset_id, datapoint)
+        if key not in self._series_index:
+            raise KeyError(f"series {key} is not in {self.path}")
+        lo = 0 if start is None else self.timestep_index(start)
+        hi = self.timesteps if end is None else self.timestep_index(end)
+        return self._series_index[key], lo, max(lo, hi)
+
+    def values(self, asset_id: str, datapoint: str, start=None, end=None) -> memoryview:
+        """Values of one series over [start, end) as a zero-copy memoryview; gaps are NaN.
+
+        The view is valid until ``close()``, which releases it; use ``.tolist()`` or ``array`` for a copy.
+        """
+        s, lo, hi = self._window(asset_id, datapoint, start, end)
+        view = self._values[s * self.timesteps + lo:s * self.timesteps + hi]
+        self._exported[next(self._export_ids)] = view
+        return view
+
+    def present(self, asset_id: str, datapoint: str, start=None, end=None) -> List[bool]:
+        """Gap bitmap of one series over [start, end): True where the generator emitted a row."""
+        s, lo, hi = self._window(asset_id, datapoint, start, end)
+        row = s * self._bitmap_row
+        return [bool(self._bitmap[row + i // 8] >> (i % 8) & 1) for i in range(lo, hi)]
+
+    def matrix(self):
+        """The whole value matrix as a (series, timesteps) numpy array sharing the mapped pages.
+
+        Drop the array before ``close()``: the mapping cannot be released while it is exported.
+        """
+        import numpy as np  # only needed by callers that want array maths
+
+        dtype = np.float32 if self.itemsize == 4 else np.float64
+        return np.frombuffer(self._values, dtype=dtype).reshape(len(self.series), self.timesteps)
+
+
+def site_header(site: str, params: Optional[Mapping] = None) -> Dict:
+    """Store header for a site: its timeline and every configured series, including fully gapped ones."""
+    params = load_params(site) if params is None else params
+    cfg = load_generator(site)._resolve_config(params, {}, require_asset_types=True)
+    return {
+        "customer": cfg["customer"],
+        "site": cfg["site"],
+        "timeline": {
+            "start": cfg["start"].strftime(TS_FORMAT),
+            "step_seconds": cfg["step"].total_seconds(),
+            "timesteps": cfg["total_timesteps"],
+        },
+        "series": [{"asset_type": asset_type, "asset_id": asset_id, "datapoint": datapoint}
+                   for asset_type, asset_id in cfg["asset_pairs"] for datapoint in cfg["datapoints"]],
+    }
+
+
+def write_site(site: str, path: Optional[Path] = None, itemsize: int = 8, overrides: Optional[Mapping] = None) -> Path:
+    params = load_params(site, overrides)
+    path = path or STORE_DIR / f"{site}.f{itemsize * 8}"
+    return write_store(path, site_header(site, params), generate_rows(site, params), itemsize)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write_cmd = commands.add_parser("write", help="run a site's generator and write its store")
+    write_cmd.add_argument("--site", required=True, choices=SITES)
+    write_cmd.add_argument("--dtype", choices=("float32", "float64"), default="float64")
+    write_cmd.add_argument("--engine", help="override interview_params.engine")
+    write_cmd.add_argument("--out", help=f"store path (default: {STORE_DIR}/<site>.f32|f64)")
+
+    info_cmd = commands.add_parser("info", help="print a store's header summary")
+    info_cmd.add_argument("path")
+
+    args = parser.parse_args(argv)
+    if args.command == "write":
+        path = write_site(args.site, Path(args.out) if args.out else None,
+                          itemsize=4 if args.dtype == "float32" else 8,
+                          overrides={"engine": args.engine} if args.engine else None)
+        print(f"wrote {path} ({path.stat().st_size / 1e6:.1f} MB)")
+        return 0
+
+    with SeriesStore(Path(args.path)) as store:
+        timeline = store.header["timeline"]
+        print(f"{store.header['site']}: {len(store.series)} series x {store.timesteps} timesteps "
+              f"from {timeline['start']} every {timeline['step_seconds']:g}s, float{store.itemsize * 8}")
+        for series in store.series:
+            present = store.present(series["asset_id"], series["datapoint"])
+            print(f"  {series['asset_id']} {series['datapoint']}: {sum(present)} rows, {len(present) - sum(present)} gaps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Produce any asset/datapoint/time slice of a legacy landing dataset without a full run.
+
+``index`` runs the generator once and stores a snapshot of every series' state (RNG, trend,
+setpoint, failure state) every ``--interval-hours``, plus where gaps and anomalies landed.
+``slice`` then replays only the requested series from the nearest snapshot, producing rows
+identical to the corresponding rows of the full run.
+
+    python tools/lnd_slice.py index --site SITE1
+    python tools/lnd_slice.py slice --site SITE1 --assets CRAH-001 --datapoints temperature \\
+        --start 2025-03-01 --end 2025-03-07 --out crah001_march.csv
+"""
+import argparse
+import csv
+import pickle
+import sys
+from pathlib import Path
+
+from lnd_local import INTERNAL_COLUMNS, PROJECT_DIR, SITES, load_generator, load_params
+
+INDEX_DIR = PROJECT_DIR / "target" / "lnd_snapshots"
+
+
+def _index_path(args) -> Path:
+    return Path(args.index) if args.index else INDEX_DIR / f"{args.site}.pickle"
+
+
+def build_index(args) -> int:
+    generator = load_generator(args.site)
+    params = load_params(args.site)
+    interval = max(1, int(args.interval_hours * 60 / (generator._time_step_for(
+        str(params.get("granularity", "hour"))).total_seconds() / 60)))
+    index = generator.build_snapshot_index(params, interval, default_datapoints={}, require_asset_types=True)
+    path = _index_path(args)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    print(f"indexed {len(index['series'])} series every {interval} steps into {path}")
+    return 0
+
+
+def write_slice(args) -> int:
+    path = _index_path(args)
+    if not path.exists():
+        print(f"no snapshot index at {path}; run `lnd_slice.py index --site {args.site}` first", file=sys.stderr)
+        return 1
+    with open(path, "rb") as f:
+        index = pickle.load(f)
+    rows = load_generator(args.site).generate_slice(
+        load_params(args.site), index,
+        asset_ids=args.assets, datapoints=args.datapoints,
+        window_start=args.start, window_end=args.end,
+        default_datapoints={}, require_asset_types=True,
+    )
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=list(INTERNAL_COLUMNS))
+    writer.writeheader()
+    writer.writerows(rows)
+    if args.out:
+        out.close()
+        print(f"wrote {len(rows)} rows to {args.out}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    index_cmd = commands.add_parser("index", help="run the generator once and write the snapshot index")
+    index_cmd.add_argument("--site", required=True, choices=SITES)
+    index_cmd.add_argument("--interval-hours", type=float, default=168.0,
+                           help="snapshot spacing; a slice replays at most this much extra history per series")
+    index_cmd.add_argument("--index", help=f"index file (default: {INDEX_DIR}/<site>.pickle)")
+    index_cmd.set_defaults(func=build_index)
+
+    slice_cmd = commands.add_parser("slice", help="write the rows of one slice as CSV")
+    slice_cmd.add_argument("--site", required=True, choices=SITES)
+    slice_cmd.add_argument("--assets", nargs="+", help="asset ids (default: all)")
+    slice_cmd.add_argument("--datapoints", nargs="+", help="datapoints (default: all)")
+    slice_cmd.add_argument("--start", help="window start, inclusive (default: config start)")
+    slice_cmd.add_argument("--end", help="window end, inclusive (default: config end)")
+    slice_cmd.add_argument("--index", help=f"index file (default: {INDEX_DIR}/<site>.pickle)")
+    slice_cmd.add_argument("--out", help="CSV path (default: stdout)")
+    slice_cmd.set_defaults(func=write_slice)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
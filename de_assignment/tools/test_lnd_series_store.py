@@ -0,0 +1,61 @@
+"""Tests for the memory-mapped series store: ``python -m pytest tools``."""
+import math
+
+import pytest
+
+from lnd_series_store import SeriesStore, write_store
+
+HEADER = {
+    "customer": "CG",
+    "site": "TEST",
+    "timeline": {"start": "2025-01-01 00:00:00", "step_seconds": 3600.0, "timesteps": 4},
+    "series": [{"asset_type": "CRAH", "asset_id": "CRAH-001", "datapoint": "temperature"}],
+}
+ROWS = [{"asset_id": "CRAH-001", "datapoint": "temperature", "ts": f"2025-01-01 0{h}:00:00", "value": f"{20 + h}"}
+        for h in (0, 1, 3)]
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return write_store(tmp_path / "test.f64", HEADER, ROWS)
+
+
+def test_values_and_gaps(store_path):
+    with SeriesStore(store_path) as store:
+        values = store.values("CRAH-001", "temperature")
+        assert [v for i, v in enumerate(values) if i != 2] == [20.0, 21.0, 23.0]
+        assert math.isnan(values[2])
+        assert store.present("CRAH-001", "temperature") == [True, True, False, True]
+
+
+def test_close_with_live_slices(store_path):
+    store = SeriesStore(store_path)
+    window = store.values("CRAH-001", "temperature", "2025-01-01 01:00:00", "2025-01-01 03:00:00")
+    copied = window.tolist()
+    store.close()
+    assert store._file.closed
+    assert store._mmap.closed
+    with pytest.raises(ValueError):
+        window[0]
+    assert copied[0] == 21.0
+
+
+def test_close_with_live_matrix_still_closes_file(store_path):
+    np = pytest.importorskip("numpy")
+    store = SeriesStore(store_path)
+    matrix = store.matrix()
+    assert np.nanmax(matrix) == 23.0
+    with pytest.raises(BufferError):
+        store.close()
+    assert store._file.closed
+
+
+def test_long_lived_reader_does_not_accumulate_slices(store_path):
+    store = SeriesStore(store_path)
+    kept = store.values("CRAH-001", "temperature")
+    for _ in range(1000):
+        assert store.values("CRAH-001", "temperature", "2025-01-01 01:00:00")[0] == 21.0
+    assert len(store._exported) == 1
+    store.close()
+    with pytest.raises(ValueError):
+        kept[0]